@@ -134,9 +134,12 @@ def save_mgd_barplot(
     ylabel: str = "Mean gender difference",
     x: str = "subject",
     y: str = "mean_gender_diff",
+    ci_lower: str = "ci_lower",
+    ci_upper: str = "ci_upper",
 ):
     """Plots and saves a mean gender difference barplot
-    and saves related data
+    and saves related data. If the data contains confidence
+    interval columns, these are shown as error bars.
 
     Args:
         data: Data to be used in the plot
@@ -152,6 +155,10 @@ def save_mgd_barplot(
             Defaults to "subject".
         y: Name of the column of data to plot on the y axis.
             Defaults to "mean_gender_diff".
+        ci_lower: Name of the column of data containing the lower
+            bound of the confidence interval. Defaults to "ci_lower".
+        ci_upper: Name of the column of data containing the upper
+            bound of the confidence interval. Defaults to "ci_upper".
     """
     ax = sns.barplot(
         x=x,
@@ -159,6 +166,15 @@ def save_mgd_barplot(
         data=data,
         palette=palette,
     )
+    if {ci_lower, ci_upper}.issubset(data.columns):
+        ax.errorbar(
+            x=range(len(data)),
+            y=data[y],
+            yerr=[data[y] - data[ci_lower], data[ci_upper] - data[y]],
+            fmt="none",
+            ecolor="black",
+            capsize=4,
+        )
 
     ax.set(xlabel=xlabel, ylabel=ylabel, title=title, ylim=(0, 0.018))
     make_path_if_not_exist(save_dir)
@@ -0,0 +1,23 @@
+from comp_sci_gender_bias.getters.school_data import text_descriptions
+from comp_sci_gender_bias.getters.scraped_data import scraped_data
+
+
+def course_descriptions() -> dict:
+    """Course descriptions from all data sources
+
+    Returns:
+        Dictionary in the format
+            data source ('bit' or 'scraped'): {subject label: list of descriptions}
+    """
+    scraped = scraped_data()
+    return {
+        "bit": {
+            "CS": list(text_descriptions(subject="compsci").values()),
+            "Geo": list(text_descriptions(subject="geo").values()),
+        },
+        "scraped": {
+            "CS": list(scraped["CompSci"].values),
+            "Drama": list(scraped["Drama"].values),
+            "Geo": list(scraped["Geography"].values),
+        },
+    }
@@ -2,8 +2,11 @@ from comp_sci_gender_bias.getters.school_data import text_descriptions
 from comp_sci_gender_bias.pipeline.glove_differences.process_text_utils import (
     TokenTagger,
     TextCleaner,
+    SPELL_CACHE_FILE,
+    WORD_POS_CACHE_DIR,
     GloveDistances,
-    get_word_comparisons,
+    SubjectWordCounts,
+    lemmas_as_words,
     word_pos_corpus,
 )
 import pandas as pd
@@ -14,37 +17,120 @@ import pathlib
 
 GLOVE_DIMENSIONS = 300
 SAVE_DIR = PROJECT_DIR / "outputs/tables/most_frequent_word_gender_differences"
-POS_QUERIES = ["POS == 'NOUN'", "POS in ['ADJ', 'ADV']", "POS == 'VERB'"]
-POS_LABELS = ["noun", "adjadv", "verb"]
+POS_GROUPS = {"NOUN": "noun", "ADJ": "adjadv", "ADV": "adjadv", "VERB": "verb"}
 
 
-def make_freq_word_male_fem_diff(
-    sub1_word_pos_corpus: pd.DataFrame,
-    sub2_word_pos_corpus: pd.DataFrame,
+def make_freq_word_male_fem_diffs(
+    subject_word_pos_corpora: dict,
     glove_dists: GloveDistances,
-) -> pd.DataFrame:
-    """Make dataframe containing columns for subject1 - subject2 freq, POS,
-    Word freq, Word count, Male - Female
+) -> dict:
+    """Make dataframes containing columns for subject1 - subject2 freq, POS,
+    Word freq, Word count, Male - Female for every ordered pair of subjects.
+    The word counts are made once from all the corpora and each word is
+    scored once.
 
     Args:
-        sub1_word_pos_corpus: Dataframe containing columns for Word, POS, Corpus
-            for subject 1
-        sub2_word_pos_corpus: Dataframe containing columns for Word, POS, Corpus
-            for subject 2
+        subject_word_pos_corpora: Dictionary in the format
+            subject: Dataframe containing columns for Word, POS, Corpus
         glove_dists: GloveDistances class object
 
     Returns:
-        Dataframe containing columns for subject1 - subject2 freq, POS,
-            Word freq, Word count, Male - Female
+        Dictionary in the format
+            (subject1, subject2): Dataframe containing columns for
+                subject1 - subject2 freq, POS, Word freq, Word count,
+                Male - Female
     """
-    word_differences_df = get_word_comparisons(
-        sub1_word_pos_corpus, sub2_word_pos_corpus
+    subject_word_counts = SubjectWordCounts(subject_word_pos_corpora)
+    vocab_scores, _ = glove_dists.gender_similarity_difference_array(
+        subject_word_counts.vocab
     )
-    glove_sims = glove_dists.gender_similarity_difference_word_list(
-        word_differences_df.index.tolist()
+    vocab_scores = pd.Series(
+        vocab_scores.astype(float), index=subject_word_counts.vocab
     )
-    word_differences_df["Male - Female"] = word_differences_df.index.map(glove_sims)
-    return word_differences_df
+    word_comparisons = subject_word_counts.word_comparisons()
+    return {
+        subject_pair: word_differences_df.assign(
+            **{
+                "Male - Female": vocab_scores.reindex(
+                    word_differences_df.index
+                ).to_numpy()
+            }
+        )
+        for subject_pair, word_differences_df in word_comparisons.items()
+    }
+
+
+def top_n_by_pos_group(
+    word_diffs_df: pd.DataFrame,
+    sort_col: str,
+    top_n: int,
+    pos_groups: dict = POS_GROUPS,
+) -> dict:
+    """Rows with the top n values of a column for each POS group. The
+    POS group of each row is found once and the top n of every group are
+    selected together, without sorting each group in full.
+
+    Args:
+        word_diffs_df: Dataframe containing a POS column
+        sort_col: Column to select the top n values of
+        top_n: Top n results
+        pos_groups: Dictionary in the format POS: POS group
+
+    Returns:
+        Dictionary in the format POS group: top n rows (sorted by sort_col
+            in descending order), for every POS group
+    """
+    pos_group = word_diffs_df["POS"].map(pos_groups).to_numpy()
+    # Select on row positions so that repeated index values are kept apart
+    top_positions = (
+        pd.Series(word_diffs_df[sort_col].to_numpy())
+        .groupby(pos_group, sort=False)
+        .nlargest(top_n)
+    )
+    group_positions = {
+        group: positions.index.get_level_values(-1)
+        for group, positions in top_positions.groupby(level=0, sort=False)
+    }
+    return {
+        group: word_diffs_df.iloc[group_positions.get(group, [])]
+        for group in dict.fromkeys(pos_groups.values())
+    }
+
+
+def save_top_n_differences(
+    word_diffs_dfs: dict,
+    source: str,
+    word_or_lemma: str,
+    pos_groups: dict = POS_GROUPS,
+    top_n: int = 20,
+    save_dir: pathlib.Path = SAVE_DIR,
+):
+    """Saves the words with the top n subject frequency differences for
+    each POS group and ordered pair of subjects to csv
+
+    Args:
+        word_diffs_dfs: Dictionary in the format
+            (subject1, subject2): Dataframe containing columns for
+                subject1 - subject2 freq, POS (see make_freq_word_male_fem_diffs)
+        source: Label to use in csv filename to indicate
+            where the data came from
+        word_or_lemma: "Word" or "Lemma", used in the csv filename
+            and as the index label
+        pos_groups: Dictionary in the format POS: POS group, the POS
+            group is used in the csv filename
+        top_n: Top n results
+        save_dir: Directory to save csv files to
+    """
+    for (subject_1, subject_2), word_diffs_df in word_diffs_dfs.items():
+        top_n_dfs = top_n_by_pos_group(
+            word_diffs_df, f"{subject_1} - {subject_2} freq", top_n, pos_groups
+        )
+        for lbl, top_n_df in top_n_dfs.items():
+            top_n_df.to_csv(
+                save_dir
+                / f"{subject_1}_{subject_2}_diff_{lbl}_{source}_data_{word_or_lemma.lower()}.csv",
+                index_label=word_or_lemma,
+            )
 
 
 def make_query_save_differences(
@@ -54,29 +140,26 @@ def make_query_save_differences(
     sub2_lbl: str,
     glove_dists: GloveDistances,
     source: str,
-    lemma: bool = False,
-    pos_queries: list = POS_QUERIES,
-    pos_labels: list = POS_LABELS,
+    pos_groups: dict = POS_GROUPS,
     top_n: int = 20,
     save_dir: pathlib.Path = SAVE_DIR,
 ):
     """Makes dataframes containing columns for subject1 and subject2 for
     subject freq difference, POS, Word freq, Word count, Male - Female.
-    Queries dataframes to select for POS, sorts by largest subject frequency
-    difference and saves top n to csv.
+    Selects the words with the largest subject frequency difference for
+    each POS group and saves the top n to csv. Csv files are saved for both words
+    and lemmas, from the same cleaned and tagged descriptions.
 
     Args:
         sub1_descriptions: Subject 1 course descriptions
         sub1_lbl: Label for subject 1 e.g 'CS'
         sub2_descriptions: Subject 2 course descriptions
         sub2_lbl: Label for subject 2 e.g 'GEO'
-        lemma: If True use lemma, else use word
         glove_dists: GloveDistances class object
         source: Label to use in csv filename to indicate
             where the data came from
-        queries: Queries to filter data by POS
-        pos_labels: Label to use in csv filename to indicate
-            which POS the file is for
+        pos_groups: Dictionary in the format POS: POS group, the POS group
+            is used in the csv filename to indicate which POS the file is for
         top_n: Top n results
         save_dir: Directory to save csv files to
     """
@@ -85,47 +168,38 @@ def make_query_save_differences(
         text_cleaner=text_cleaner,
         token_tagger=token_tagger,
         subject_label=sub1_lbl,
-        lemma=lemma,
+        cache_dir=WORD_POS_CACHE_DIR,
     )
     sub2_word_pos_corpus = word_pos_corpus(
         subject_descs=sub2_descriptions,
         text_cleaner=text_cleaner,
         token_tagger=token_tagger,
         subject_label=sub2_lbl,
-        lemma=lemma,
-    )
-    sub1_sub2_word_diffs_df = make_freq_word_male_fem_diff(
-        sub1_word_pos_corpus, sub2_word_pos_corpus, glove_dists
-    )
-    sub2_sub1_word_diffs_df = make_freq_word_male_fem_diff(
-        sub2_word_pos_corpus, sub1_word_pos_corpus, glove_dists
+        cache_dir=WORD_POS_CACHE_DIR,
     )
-
     make_path_if_not_exist(save_dir)
-    word_or_lemma = "Lemma" if lemma else "Word"
-
-    for query, lbl in zip(pos_queries, pos_labels):
-        sub1_sub2_word_diffs_df.query(query).sort_values(
-            f"{sub1_lbl} - {sub2_lbl} freq", ascending=False
-        ).head(top_n).to_csv(
-            SAVE_DIR
-            / f"{sub1_lbl}_{sub2_lbl}_diff_{lbl}_{source}_data_{word_or_lemma.lower()}.csv",
-            index_label=word_or_lemma,
+
+    for word_or_lemma in ["Word", "Lemma"]:
+        if word_or_lemma == "Lemma":
+            sub1_corpus = lemmas_as_words(sub1_word_pos_corpus)
+            sub2_corpus = lemmas_as_words(sub2_word_pos_corpus)
+        else:
+            sub1_corpus = sub1_word_pos_corpus
+            sub2_corpus = sub2_word_pos_corpus
+        word_diffs_dfs = make_freq_word_male_fem_diffs(
+            {sub1_lbl: sub1_corpus, sub2_lbl: sub2_corpus}, glove_dists
         )
-        sub2_sub1_word_diffs_df.query(query).sort_values(
-            f"{sub2_lbl} - {sub1_lbl} freq", ascending=False
-        ).head(top_n).to_csv(
-            SAVE_DIR
-            / f"{sub2_lbl}_{sub1_lbl}_diff_{lbl}_{source}_data_{word_or_lemma.lower()}.csv",
-            index_label=word_or_lemma,
+
+        save_top_n_differences(
+            word_diffs_dfs, source, word_or_lemma, pos_groups, top_n, save_dir
         )
 
 
 if __name__ == "__main__":
-    text_cleaner = TextCleaner()
+    text_cleaner = TextCleaner(spell_cache_file=SPELL_CACHE_FILE)
     token_tagger = TokenTagger()
     glove_dists = GloveDistances(glove_d=GLOVE_DIMENSIONS)
-    glove_dists.load_glove2word2vec()
+    glove_dists.load_score_table()
 
     # Save files for BIT data
     compsci_descr = text_descriptions(subject="compsci").values()
@@ -136,7 +210,6 @@ if __name__ == "__main__":
         sub1_lbl="CS",
         sub2_descriptions=geo_descr,
         sub2_lbl="Geo",
-        lemma=False,
         glove_dists=glove_dists,
         source="bit",
     )
@@ -151,7 +224,7 @@ if __name__ == "__main__":
         sub1_lbl="CS",
         sub2_descriptions=drama_descr_scraped,
         sub2_lbl="Drama",
-        lemma=False,
         glove_dists=glove_dists,
         source="scraped",
     )
+    text_cleaner.save_spell_cache()
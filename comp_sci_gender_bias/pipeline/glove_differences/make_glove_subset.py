@@ -0,0 +1,67 @@
+from comp_sci_gender_bias.pipeline.glove_differences.process_text_utils import (
+    TokenTagger,
+    TextCleaner,
+    SPELL_CACHE_FILE,
+    WORD_POS_CACHE_DIR,
+    N_JOBS,
+    GloveDistances,
+    word_pos_corpus,
+)
+from comp_sci_gender_bias.pipeline.glove_differences.make_differences import (
+    GLOVE_DIMENSIONS,
+)
+from comp_sci_gender_bias.getters.course_descriptions import course_descriptions
+
+
+def corpora_vocab(
+    descriptions: dict,
+    text_cleaner: TextCleaner,
+    token_tagger: TokenTagger,
+    n_jobs: int = 1,
+    cache_dir: str = None,
+) -> set:
+    """Find all the words and lemmas used in the course descriptions
+    of every data source and subject
+
+    Args:
+        descriptions: Dictionary in the format
+            data source: {subject label: list of descriptions}
+        text_cleaner: Class to clean text
+        token_tagger: Class to part of speech tag text
+        n_jobs: Number of processes to clean and tag the descriptions across
+        cache_dir: Directory of saved cleaned and tagged corpora
+            (see word_pos_corpus)
+
+    Returns:
+        Set of words and lemmas
+    """
+    vocab = set()
+    for subject_descriptions in descriptions.values():
+        for subject_label, descs in subject_descriptions.items():
+            subject_word_pos_corpus = word_pos_corpus(
+                subject_descs=descs,
+                text_cleaner=text_cleaner,
+                token_tagger=token_tagger,
+                subject_label=subject_label,
+                n_jobs=n_jobs,
+                cache_dir=cache_dir,
+            )
+            # Words and lemmas share their categories (the corpus vocab)
+            vocab.update(subject_word_pos_corpus["Word"].cat.categories)
+    return vocab
+
+
+if __name__ == "__main__":
+    text_cleaner = TextCleaner(spell_cache_file=SPELL_CACHE_FILE)
+    vocab = corpora_vocab(
+        course_descriptions(),
+        text_cleaner,
+        TokenTagger(),
+        n_jobs=N_JOBS,
+        cache_dir=WORD_POS_CACHE_DIR,
+    )
+    text_cleaner.save_spell_cache()
+
+    glove_dists = GloveDistances(glove_d=GLOVE_DIMENSIONS)
+    glove_dists.load_glove_mmap()
+    glove_dists.save_glove_subset(vocab)
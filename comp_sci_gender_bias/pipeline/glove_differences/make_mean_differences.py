@@ -1,122 +1,395 @@
 from comp_sci_gender_bias.pipeline.glove_differences.process_text_utils import (
     TextCleaner,
+    SPELL_CACHE_FILE,
+    WORD_POS_CACHE_DIR,
+    N_JOBS,
     TokenTagger,
     GloveDistances,
+    distinct_codes,
     word_pos_corpus,
 )
+from comp_sci_gender_bias.pipeline.glove_differences.resampling_utils import (
+    description_score_sums,
+    bootstrap_mean_ci,
+    permutation_test,
+)
 from comp_sci_gender_bias.getters.school_data import text_descriptions
 from comp_sci_gender_bias.getters.scraped_data import scraped_data
 from comp_sci_gender_bias.getters.subject_terminology import subject_specific_words
 from comp_sci_gender_bias.utils.io import make_path_if_not_exist
 from comp_sci_gender_bias import PROJECT_DIR
 
+from itertools import combinations
+import numpy as np
 import pandas as pd
 
-from typing import Union
-
+from typing import Optional, Tuple
 
 MEAN_DIFFERENCES_SAVE_PATH = PROJECT_DIR / "outputs/mean_differences"
 GLOVE_DIMENSIONS = 300
 
-POS_QUERIES = ["POS == 'NOUN'", "POS in ['ADJ', 'ADV']", "POS == 'VERB'"]
 POS_LABELS = ["Noun", "Adj/Adv", "Verb"]
+POS_GROUPS = {"NOUN": "Noun", "ADJ": "Adj/Adv", "ADV": "Adj/Adv", "VERB": "Verb"}
+N_RESAMPLES = 10000
+N_PERMUTATIONS = 100000
+WORD_REMOVALS = ["crucial", "optional", None]
+# Subjects with subject specific terminology (see subject_specific_words)
+TERMINOLOGY_SUBJECTS = ["cs", "geo"]
+
+# Masculine and feminine comparison words to check the sensitivity
+# of the mean gender differences to the choice of comparison words
+COMPARISON_VARIANTS = {
+    "default": (
+        ["man", "he", "his", "masculine", "male"],
+        ["woman", "she", "her", "feminine", "female"],
+    ),
+    "pronouns": (["he", "him", "his", "himself"], ["she", "her", "hers", "herself"]),
+    "family": (
+        ["man", "boy", "father", "son", "brother"],
+        ["woman", "girl", "mother", "daughter", "sister"],
+    ),
+    "gender": (["masculine", "male"], ["feminine", "female"]),
+}
+
+
+def pos_group_codes(pos: pd.Series) -> np.ndarray:
+    """Position in POS_LABELS of the POS group of each word
+    (-1 if the POS is not in POS_GROUPS)"""
+    pos_codes, pos_labels = distinct_codes(pos)
+    label_groups = pd.Categorical(
+        pos_labels.map(POS_GROUPS), categories=POS_LABELS
+    ).codes
+    # Code -1 (a missing POS) is not in a group
+    return np.append(label_groups, -1)[pos_codes]
+
+
+def word_removal_masks(
+    vocab: pd.Index, subject: str, word_removals: list
+) -> np.ndarray:
+    """Whether each word in a vocab is removed for each word removal.
+    Words are only removed for subjects with subject specific terminology
+    (see TERMINOLOGY_SUBJECTS), e.g. no words are removed for Drama.
+
+    Args:
+        vocab: Words to check
+        subject: Subject label e.g. "CS"
+        word_removals: Subject related words to remove.
+            "crucial", "optional" or None for each
+
+    Returns:
+        (number of word_removals x number of words) boolean array
+    """
+    removed = np.zeros((len(word_removals), len(vocab)), dtype=bool)
+    terminology_subject = subject.lower()
+    if terminology_subject not in TERMINOLOGY_SUBJECTS:
+        return removed
+    for i, word_removal in enumerate(word_removals):
+        if word_removal is not None:
+            removed[i] = vocab.isin(
+                subject_specific_words(
+                    subject=terminology_subject, specific_word_type=word_removal
+                )
+            )
+    return removed
 
 
-def calc_mean_gender_diff(
+def description_pos_score_sums(
     sub_word_pos_corpus: pd.DataFrame,
     glove_dists: GloveDistances,
-    data_source_lbl: str,
     subject: str,
-    word_removal: Union[str, None],
-):
-    """Calculate the mean gender difference for each POS
-    for all the words in a subject corpus
+    word_removals: list = WORD_REMOVALS,
+    n_descriptions: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Sum the Male - Female scores and count the scored words in each
+    description for each word removal and POS group.
+
+    Each word in the vocab is scored once. The words are grouped by
+    description, POS group and which of the word removals remove them
+    in a single reduction, and the sums for each word removal are added
+    up from the groups of words it keeps. Words not in the GloVe vocab
+    are not included.
 
     Args:
         sub_word_pos_corpus: Dataframe containing each word in corpus
-            with associated POS and Corpus label
+            with associated POS, Corpus label and Description
+            (see word_pos_corpus with description_index=True)
         glove_dists: GloveDistances class object
+        subject: Subject label e.g. "CS"
+        word_removals: Subject related words to remove.
+            "crucial", "optional" or None for each
+        n_descriptions: Number of descriptions in the corpus, including
+            those with no words. Defaults to the n_descriptions attribute
+            set by word_pos_corpus, or if the attribute is missing (e.g. after
+            a concat), one more than the largest Description, which leaves
+            out empty descriptions at the end of the corpus
+
+    Returns:
+        A tuple of (n_descriptions x (number of word_removals x number of
+        POS_LABELS)) arrays, with the POS_LABELS columns of each word
+        removal in turn:
+            - sum of the Male - Female scores
+            - number of scored words
+    """
+    word_codes, vocab = distinct_codes(sub_word_pos_corpus["Word"])
+    vocab_scores, _ = glove_dists.gender_similarity_difference_array(vocab)
+    removed = word_removal_masks(vocab, subject, word_removals)
+
+    # Bit i of a word's removal signature is set if word_removals[i] removes it
+    n_signatures = 2 ** len(word_removals)
+    vocab_signatures = removed.T.astype(np.int64) @ (2 ** np.arange(len(word_removals)))
+    # Code -1 (a missing word) has no score, so it is not included
+    vocab_scores = np.append(vocab_scores, np.nan)
+    vocab_signatures = np.append(vocab_signatures, 0)
+    pos_groups = pos_group_codes(sub_word_pos_corpus["POS"])
+    if n_descriptions is None:
+        n_descriptions = sub_word_pos_corpus.attrs.get("n_descriptions")
+    if n_descriptions is None:
+        description_ids = sub_word_pos_corpus["Description"]
+        n_descriptions = int(description_ids.max()) + 1 if len(description_ids) else 0
+    sums, counts = description_score_sums(
+        description_ids=sub_word_pos_corpus["Description"].to_numpy(),
+        group_ids=np.where(
+            pos_groups >= 0,
+            pos_groups * n_signatures + vocab_signatures[word_codes],
+            -1,
+        ),
+        scores=vocab_scores[word_codes].astype(float),
+        n_descriptions=n_descriptions,
+        n_groups=len(POS_LABELS) * n_signatures,
+    )
+
+    # keeps[i, j]: whether word_removals[i] keeps the words with signature j
+    keeps = (
+        np.arange(n_signatures) >> np.arange(len(word_removals))[:, np.newaxis]
+    ) & 1 == 0
+    return tuple(
+        (
+            totals.reshape(n_descriptions, len(POS_LABELS), n_signatures)
+            @ keeps.T.astype(float)
+        )
+        .transpose(0, 2, 1)
+        .reshape(n_descriptions, len(word_removals) * len(POS_LABELS))
+        for totals in (sums, counts)
+    )
+
+
+def calc_mean_gender_diffs(
+    sums: np.ndarray,
+    counts: np.ndarray,
+    data_source_lbl: str,
+    subject: str,
+    word_removals: list = WORD_REMOVALS,
+    n_resamples: int = N_RESAMPLES,
+) -> pd.DataFrame:
+    """Calculate the mean gender difference for each word removal and POS
+    for all the words in a subject corpus, with bootstrap 95% confidence
+    intervals from resampling the descriptions (all the word removals
+    use the same resamples)
+
+    Args:
+        sums: Sum of the Male - Female scores in each description
+            (see description_pos_score_sums)
+        counts: Number of scored words in each description
         data_source_lbl: Data source label
         subject: Subject
-        word_removal: Subject related words to remove.
-            "crucial", "optional" or None
+        word_removals: Subject related words removed, in the
+            order of the columns of sums and counts
+        n_resamples: Number of bootstrap resamples
 
     Returns:
         Dataframe with columns for:
             - POS
             - mean_gender_diff
+            - ci_lower
+            - ci_upper
             - subject
             - data_source
             - words_removed
     """
-    if word_removal is not None and subject != "drama":
-        words_to_remove = subject_specific_words(
-            subject=subject, specific_word_type=word_removal
-        )
-    else:
-        words_to_remove = []
-
-    words = [
-        word
-        for word in sub_word_pos_corpus["Word"].tolist()
-        if word not in words_to_remove
-    ]
-    glove_sims = glove_dists.gender_similarity_difference_word_list(words)
-    sub_word_pos_corpus["Male - Female"] = sub_word_pos_corpus["Word"].map(glove_sims)
-    sub_word_pos_corpus = sub_word_pos_corpus.dropna()
-    mgds = [
-        sub_word_pos_corpus.query(query)["Male - Female"].mean()
-        for query in POS_QUERIES
-    ]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mgds = sums.sum(axis=0) / counts.sum(axis=0)
+    ci_lower, ci_upper = bootstrap_mean_ci(
+        sums, counts, n_resamples=n_resamples, seed=0
+    )
     return pd.DataFrame.from_dict(
         {
-            "POS": POS_LABELS,
+            "POS": POS_LABELS * len(word_removals),
             "mean_gender_diff": mgds,
+            "ci_lower": ci_lower,
+            "ci_upper": ci_upper,
             "subject": subject,
             "data_source": data_source_lbl,
-            "words_removed": word_removal,
+            "words_removed": [
+                word_removal for word_removal in word_removals for _ in POS_LABELS
+            ],
         }
     )
 
 
-def save_bit_mean_gender_diff(
-    cs_bit_word_pos_corpus: pd.DataFrame,
-    geo_bit_word_pos_corpus: pd.DataFrame,
+def calc_subject_pair_p_values(
+    subject_sums_counts: dict,
+    data_source_lbl: str,
+    word_removals: list = WORD_REMOVALS,
+    n_permutations: int = N_PERMUTATIONS,
+    n_jobs: int = N_JOBS,
+) -> pd.DataFrame:
+    """Permutation test of the difference in mean gender difference between
+    each pair of subjects for each word removal and POS, shuffling the
+    subject labels of the course descriptions (all the word removals
+    use the same permutations)
+
+    Args:
+        subject_sums_counts: Dictionary in the format
+            subject: (sums, counts) (see description_pos_score_sums)
+        data_source_lbl: Data source label
+        word_removals: Subject related words removed, in the
+            order of the columns of the sums and counts
+        n_permutations: Number of permutations
+        n_jobs: Number of processes to split the permutations across
+
+    Returns:
+        Dataframe with columns for:
+            - POS
+            - subject_1
+            - subject_2
+            - mean_gender_diff_difference (subject_1 - subject_2)
+            - p_value
+            - data_source
+            - words_removed
+    """
+    p_values = []
+    for subject_1, subject_2 in combinations(subject_sums_counts, 2):
+        observed, p_value = permutation_test(
+            *subject_sums_counts[subject_1],
+            *subject_sums_counts[subject_2],
+            n_permutations=n_permutations,
+            seed=0,
+            n_jobs=n_jobs,
+        )
+        p_values.append(
+            pd.DataFrame.from_dict(
+                {
+                    "POS": POS_LABELS * len(word_removals),
+                    "subject_1": subject_1,
+                    "subject_2": subject_2,
+                    "mean_gender_diff_difference": observed,
+                    "p_value": p_value,
+                    "data_source": data_source_lbl,
+                    "words_removed": [
+                        word_removal
+                        for word_removal in word_removals
+                        for _ in POS_LABELS
+                    ],
+                }
+            )
+        )
+    return pd.concat(p_values)
+
+
+def calc_mean_gender_diff_comparison_sweep(
+    sub_word_pos_corpus: pd.DataFrame,
+    glove_dists: GloveDistances,
+    data_source_lbl: str,
+    subject: str,
+    comparison_variants: dict = COMPARISON_VARIANTS,
+) -> pd.DataFrame:
+    """Calculate the mean gender difference for each POS for all the words
+    in a subject corpus, for every variant of the masculine and feminine
+    comparison words in one pass over the corpus
+
+    Args:
+        sub_word_pos_corpus: Dataframe containing each word in corpus
+            with associated POS and Corpus label
+        glove_dists: GloveDistances class object with the GloVe vectors loaded
+        data_source_lbl: Data source label
+        subject: Subject
+        comparison_variants: Dictionary in the format
+            variant name: (masculine comparisons, feminine comparisons)
+
+    Returns:
+        Dataframe with columns for:
+            - POS
+            - comparison_variant
+            - mean_gender_diff
+            - subject
+            - data_source
+    """
+    scores, _ = glove_dists.gender_similarity_difference_matrix(
+        sub_word_pos_corpus["Word"], list(comparison_variants.values())
+    )
+    return (
+        pd.DataFrame(scores, columns=list(comparison_variants.keys()))
+        .groupby(pos_group_codes(sub_word_pos_corpus["POS"]))
+        .mean()
+        .reindex(range(len(POS_LABELS)))
+        .set_axis(POS_LABELS)
+        .rename_axis("POS")
+        .reset_index()
+        .melt(
+            id_vars="POS", var_name="comparison_variant", value_name="mean_gender_diff"
+        )
+        .assign(subject=subject, data_source=data_source_lbl)
+    )
+
+
+def save_mean_gender_diffs(
+    subject_word_pos_corpora: dict,
     glove_dists: GloveDistances,
-    word_removal: Union[str, None],
+    data_source_lbl: str,
+    word_removals: list = WORD_REMOVALS,
 ):
-    """Saves dataframe of mean gender differences for each POS
-    and subject
+    """Saves dataframes of mean gender differences for each POS
+    and subject, and the permutation test p-values of the
+    differences between the subjects, for each word removal.
+    Each corpus is scored once for all the word removals.
 
     Args:
-        cs_bit_word_pos_corpus: Dataframe containing each word in corpus
-            with associated POS and Corpus label for CS using BIT data
-        geo_bit_word_pos_corpus: Dataframe containing each word in corpus
-            with associated POS and Corpus label for Geography using BIT data
+        subject_word_pos_corpora: Dictionary in the format
+            subject: Dataframe containing each word in corpus with associated
+                POS, Corpus label and Description
         glove_dists: GloveDistances class object
-        word_removal: Subject related words to remove.
-            "crucial", "optional" or None
+        data_source_lbl: Data source label e.g. "BIT"
+        word_removals: Subject related words to remove.
+            "crucial", "optional" or None for each
     """
-    mgd_bit_cs = calc_mean_gender_diff(
-        cs_bit_word_pos_corpus, glove_dists, "BIT", "CS", word_removal
-    )
-    mgd_bit_geo = calc_mean_gender_diff(
-        geo_bit_word_pos_corpus, glove_dists, "BIT", "Geo", word_removal
+    subject_sums_counts = {
+        subject: description_pos_score_sums(
+            sub_word_pos_corpus, glove_dists, subject, word_removals
+        )
+        for subject, sub_word_pos_corpus in subject_word_pos_corpora.items()
+    }
+    mgd = pd.concat(
+        [
+            calc_mean_gender_diffs(
+                *sums_counts, data_source_lbl, subject, word_removals
+            )
+            for subject, sums_counts in subject_sums_counts.items()
+        ]
     )
-    mgd_bit = pd.concat([mgd_bit_cs, mgd_bit_geo])
-    remove_lbl = "no" if word_removal is None else word_removal
-    mgd_bit.to_csv(
-        MEAN_DIFFERENCES_SAVE_PATH
-        / f"mean_differences_pos_bit_remove_{remove_lbl}_words.csv",
-        index=False,
+    p_values = calc_subject_pair_p_values(
+        subject_sums_counts, data_source_lbl, word_removals
     )
+    for word_removal in word_removals:
+        remove_lbl = "no" if word_removal is None else word_removal
+        save_path = (
+            MEAN_DIFFERENCES_SAVE_PATH
+            / f"mean_differences_pos_{data_source_lbl.lower()}_remove_{remove_lbl}_words"
+        )
+        for results, suffix in [(mgd, ""), (p_values, "_p_values")]:
+            words_removed = results["words_removed"]
+            is_word_removal = (
+                words_removed.isna()
+                if word_removal is None
+                else words_removed == word_removal
+            )
+            results[is_word_removal].to_csv(f"{save_path}{suffix}.csv", index=False)
 
 
 if __name__ == "__main__":
-    text_cleaner = TextCleaner()
+    text_cleaner = TextCleaner(spell_cache_file=SPELL_CACHE_FILE)
     token_tagger = TokenTagger()
     glove_dists = GloveDistances(glove_d=GLOVE_DIMENSIONS)
-    glove_dists.load_glove2word2vec()
+    glove_dists.load_score_table()
 
     compsci_descr = text_descriptions(subject="compsci").values()
     geo_descr = text_descriptions(subject="geo").values()
@@ -126,25 +399,27 @@ if __name__ == "__main__":
         text_cleaner=text_cleaner,
         token_tagger=token_tagger,
         subject_label="CS",
-        lemma=False,
+        description_index=True,
+        n_jobs=N_JOBS,
+        cache_dir=WORD_POS_CACHE_DIR,
     )
     geo_bit_word_pos_corpus = word_pos_corpus(
         subject_descs=geo_descr,
         text_cleaner=text_cleaner,
         token_tagger=token_tagger,
         subject_label="Geo",
-        lemma=False,
+        description_index=True,
+        n_jobs=N_JOBS,
+        cache_dir=WORD_POS_CACHE_DIR,
     )
 
     make_path_if_not_exist(MEAN_DIFFERENCES_SAVE_PATH)
 
-    for word_removal in ["crucial", "optional", None]:
-        save_bit_mean_gender_diff(
-            cs_bit_word_pos_corpus,
-            geo_bit_word_pos_corpus,
-            glove_dists,
-            word_removal=word_removal,
-        )
+    save_mean_gender_diffs(
+        {"CS": cs_bit_word_pos_corpus, "Geo": geo_bit_word_pos_corpus},
+        glove_dists,
+        "BIT",
+    )
 
     scraped = scraped_data()
     compsci_descr_scraped = list(scraped["CompSci"].values)
@@ -156,42 +431,62 @@ if __name__ == "__main__":
         text_cleaner=text_cleaner,
         token_tagger=token_tagger,
         subject_label="CS",
-        lemma=False,
+        description_index=True,
+        n_jobs=N_JOBS,
+        cache_dir=WORD_POS_CACHE_DIR,
     )
     drama_scraped_word_pos_corpus = word_pos_corpus(
         subject_descs=drama_descr_scraped,
         text_cleaner=text_cleaner,
         token_tagger=token_tagger,
         subject_label="Drama",
-        lemma=False,
+        description_index=True,
+        n_jobs=N_JOBS,
+        cache_dir=WORD_POS_CACHE_DIR,
     )
     geo_scraped_word_pos_corpus = word_pos_corpus(
         subject_descs=geography_descr_scraped,
         text_cleaner=text_cleaner,
         token_tagger=token_tagger,
         subject_label="Geo",
-        lemma=False,
+        description_index=True,
+        n_jobs=N_JOBS,
+        cache_dir=WORD_POS_CACHE_DIR,
     )
+    text_cleaner.save_spell_cache()
 
-    mgd_scraped_cs = calc_mean_gender_diff(
-        cs_scraped_word_pos_corpus, glove_dists, "Scraped", "CS", word_removal=None
-    )
-    mgd_scraped_drama = calc_mean_gender_diff(
-        drama_scraped_word_pos_corpus,
-        glove_dists,
-        "Scraped",
-        "Drama",
-        word_removal=None,
-    )
-    mgd_scraped_geo = calc_mean_gender_diff(
-        geo_scraped_word_pos_corpus,
+    save_mean_gender_diffs(
+        {
+            "CS": cs_scraped_word_pos_corpus,
+            "Drama": drama_scraped_word_pos_corpus,
+            "Geo": geo_scraped_word_pos_corpus,
+        },
         glove_dists,
         "Scraped",
-        "Geo",
-        word_removal=None,
-    )
-    mgd_scraped = pd.concat([mgd_scraped_cs, mgd_scraped_drama, mgd_scraped_geo])
-    mgd_scraped.to_csv(
-        MEAN_DIFFERENCES_SAVE_PATH / "mean_differences_pos_scraped_remove_no_words.csv",
-        index=False,
+        word_removals=[None],
     )
+
+    # Check the sensitivity of the results to the choice of comparison words
+    sweep_glove_dists = GloveDistances(glove_d=GLOVE_DIMENSIONS)
+    sweep_glove_dists.load_glove_mmap()
+    sweep_word_pos_corpora = {
+        "BIT": {"CS": cs_bit_word_pos_corpus, "Geo": geo_bit_word_pos_corpus},
+        "Scraped": {
+            "CS": cs_scraped_word_pos_corpus,
+            "Drama": drama_scraped_word_pos_corpus,
+            "Geo": geo_scraped_word_pos_corpus,
+        },
+    }
+    for data_source_lbl, subject_word_pos_corpora in sweep_word_pos_corpora.items():
+        pd.concat(
+            [
+                calc_mean_gender_diff_comparison_sweep(
+                    sub_word_pos_corpus, sweep_glove_dists, data_source_lbl, subject
+                )
+                for subject, sub_word_pos_corpus in subject_word_pos_corpora.items()
+            ]
+        ).to_csv(
+            MEAN_DIFFERENCES_SAVE_PATH
+            / f"mean_differences_pos_{data_source_lbl.lower()}_comparison_sweep.csv",
+            index=False,
+        )
@@ -1,21 +1,72 @@
-import spacy_udpipe
+import hunspell
 from hunspell import Hunspell
 from gensim.scripts.glove2word2vec import glove2word2vec
 from gensim.models.keyedvectors import KeyedVectors
 import numpy as np
 import pandas as pd
-from typing import Tuple
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from functools import lru_cache
+from importlib import metadata
+from itertools import chain, combinations
+from multiprocessing import shared_memory
+from typing import Optional, Tuple
+import hashlib
 import os
 import re
+import sqlite3
+from scipy import sparse
 from dotenv import load_dotenv
+from comp_sci_gender_bias import PROJECT_DIR
+from comp_sci_gender_bias.utils.udpipe_models import udpipe_model
 
 load_dotenv()
 
+INT8_MAX = np.iinfo(np.int8).max
+SPELL_CACHE_FILE = PROJECT_DIR / "outputs/cache/spell_corrections.sqlite"
+SPELL_CACHE_WRITE_SIZE = 1000
+NONALPHANUMERIC = re.compile("[^0-9a-zA-Z]+")
+WORD_POS_CACHE_DIR = PROJECT_DIR / "outputs/cache/word_pos_corpus"
+# Number of processes the pipeline scripts clean and tag descriptions with
+N_JOBS = 4
+WORD_POS_CACHE_COLUMNS = ["vocab", "Word", "Lemma", "POS_categories", "POS"]
+
 
 class TextCleaner:
-    def __init__(self, replace_char=" "):
-        self.hunspell = Hunspell()
+    def __init__(
+        self,
+        replace_char=" ",
+        spell_cache_size=100000,
+        spell_cache_file=None,
+        lang="en_US",
+        hunspell_data_dir=None,
+        suggestion_backend=None,
+    ):
+        self.lang = lang
+        self.hunspell_data_dir = hunspell_data_dir
+        self.spell_cache_size = spell_cache_size
+        self.hunspell = Hunspell(lang=lang, hunspell_data_dir=hunspell_data_dir)
         self.replace_char = replace_char
+        # Optional faster replacement for Hunspell.suggest,
+        # e.g. spelling_utils.SymSpellSuggester
+        self.suggestion_backend = suggestion_backend
+        # Each distinct word is only checked by Hunspell once (per process)
+        # as long as it stays in the cache
+        self._cached_spell_check = lru_cache(maxsize=spell_cache_size)(
+            self._hunspell_spell_check
+        )
+        # Corrections from previous runs (with the same Hunspell dictionary)
+        # read from the on disk cache, see save_spell_cache
+        self.spell_cache_file = spell_cache_file
+        self.dictionary_version = hunspell_dictionary_version(lang, hunspell_data_dir)
+        if suggestion_backend is not None:
+            self.dictionary_version += f"_{suggestion_backend.version}"
+        # Changes whenever the cleaned text could change
+        self.version = f"{self.dictionary_version}_{replace_char!r}"
+        self._saved_corrections = {}
+        self._new_corrections = {}
+        if spell_cache_file is not None:
+            self._saved_corrections = self._load_spell_cache()
 
     def strip_nonalphanumeric(self, text):
         """
@@ -23,7 +74,7 @@ class TextCleaner:
         with replace_char
         """
 
-        return re.sub("[^0-9a-zA-Z]+", self.replace_char, text)
+        return NONALPHANUMERIC.sub(self.replace_char, text)
 
     def spell_check(self, word):
         """
@@ -31,14 +82,128 @@ class TextCleaner:
         and return first suggestion (if any given)
         hunspell = Hunspell()
         """
-        if (len(word) <= 3) or word.isupper() or self.hunspell.spell(word):
+        if (len(word) <= 3) or word.isupper():
             return word
         else:
-            spelling_suggestions = self.hunspell.suggest(word)
+            return self._cached_spell_check(word)
+
+    def _hunspell_spell_check(self, word):
+        """Return the word if Hunspell knows it, otherwise
+        Hunspell's first suggestion (or "" if there are none).
+        Corrections saved to the spell cache file are used if available."""
+        if word in self._saved_corrections:
+            return self._saved_corrections[word]
+        if self.hunspell.spell(word):
+            correction = word
+        else:
+            spelling_suggestions = self.suggest(word)
             if spelling_suggestions:
-                return spelling_suggestions[0]
+                correction = spelling_suggestions[0]
             else:
-                return ""
+                correction = ""
+        if self.spell_cache_file is not None:
+            self._new_corrections[word] = correction
+            if len(self._new_corrections) >= SPELL_CACHE_WRITE_SIZE:
+                self.save_spell_cache()
+        return correction
+
+    def spell_check_many(self, words, n_jobs=1):
+        """
+        Spell check distinct words, optionally splitting the words
+        that need checking by Hunspell across a process pool
+
+        Args:
+            words: Distinct words to spell check
+            n_jobs: Number of processes to use
+
+        Returns:
+            Dictionary in the format word: spell checked word
+        """
+        if n_jobs == 1:
+            return {word: self.spell_check(word) for word in words}
+        to_check = [
+            word
+            for word in words
+            if len(word) > 3
+            and not word.isupper()
+            and word not in self._saved_corrections
+        ]
+        chunk_size = max(-(-len(to_check) // n_jobs), 1)
+        chunks = [
+            to_check[i : i + chunk_size] for i in range(0, len(to_check), chunk_size)
+        ]
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            checked = dict(
+                zip(
+                    to_check,
+                    chain.from_iterable(
+                        executor.map(_spell_check_words, [self] * len(chunks), chunks)
+                    ),
+                )
+            )
+        if self.spell_cache_file is not None:
+            # The workers have already saved these to the spell cache file
+            self._saved_corrections.update(checked)
+        return {
+            word: checked[word] if word in checked else self.spell_check(word)
+            for word in words
+        }
+
+    def suggest(self, word):
+        """Spelling suggestions for a word from the suggestion
+        backend if there is one, otherwise from Hunspell"""
+        if self.suggestion_backend is not None:
+            return self.suggestion_backend.suggest(word)
+        return self.hunspell.suggest(word)
+
+    def _connect_spell_cache(self):
+        """Connect to the spell cache SQLite database, creating it if needed"""
+        spell_cache_dir = os.path.dirname(os.path.abspath(self.spell_cache_file))
+        os.makedirs(spell_cache_dir, exist_ok=True)
+        connection = sqlite3.connect(self.spell_cache_file)
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS corrections ("
+            "dictionary_version TEXT, word TEXT, correction TEXT, "
+            "PRIMARY KEY (dictionary_version, word))"
+        )
+        return connection
+
+    def _load_spell_cache(self):
+        """Read the saved corrections for the Hunspell dictionary in use"""
+        with closing(self._connect_spell_cache()) as connection:
+            return dict(
+                connection.execute(
+                    "SELECT word, correction FROM corrections "
+                    "WHERE dictionary_version = ?",
+                    (self.dictionary_version,),
+                )
+            )
+
+    def save_spell_cache(self):
+        """
+        Append the corrections made since the last save to the spell cache
+        file, so that later runs (and other processes) do not need to spell
+        check these words again. New corrections are saved automatically in
+        batches of SPELL_CACHE_WRITE_SIZE, so this only needs to be called
+        once cleaning has finished.
+        """
+        if self.spell_cache_file is None or not self._new_corrections:
+            return
+        with closing(self._connect_spell_cache()) as connection:
+            with connection:
+                connection.executemany(
+                    "INSERT OR IGNORE INTO corrections VALUES (?, ?, ?)",
+                    [
+                        (self.dictionary_version, word, correction)
+                        for word, correction in self._new_corrections.items()
+                    ],
+                )
+        self._saved_corrections.update(self._new_corrections)
+        self._new_corrections = {}
+
+    def spell_cache_info(self):
+        """Hits, misses, maximum size and current size of the spell check cache"""
+        return self._cached_spell_check.cache_info()
 
     def clean(self, text):
         """
@@ -48,12 +213,100 @@ class TextCleaner:
 
         return " ".join([self.spell_check(word) for word in text.split()])
 
+    def clean_many(self, texts, n_jobs=1):
+        """
+        Apply all the cleaning steps to many text strings, spell checking
+        each distinct word once (see spell_check_many) rather than every
+        time it appears. Gives the same results as clean.
+
+        Args:
+            texts: Text strings to clean
+            n_jobs: Number of processes to spell check with
+
+        Returns:
+            List of cleaned text strings
+        """
+        texts_words = [self.strip_nonalphanumeric(text).split() for text in texts]
+        corrections = self.spell_check_many(
+            {word for words in texts_words for word in words}, n_jobs=n_jobs
+        )
+        return [
+            " ".join([corrections[word] for word in words]) for words in texts_words
+        ]
+
+    def __getstate__(self):
+        """Pickle as the construction arguments, as Hunspell can't be pickled,
+        so that each process using a TextCleaner creates its own Hunspell"""
+        return {
+            "replace_char": self.replace_char,
+            "spell_cache_size": self.spell_cache_size,
+            "spell_cache_file": self.spell_cache_file,
+            "lang": self.lang,
+            "hunspell_data_dir": self.hunspell_data_dir,
+            "suggestion_backend": self.suggestion_backend,
+        }
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+
+def hunspell_dictionary_files(lang="en_US", hunspell_data_dir=None):
+    """
+    Paths of the Hunspell .aff and .dic files for a language
+
+    Args:
+        lang: Hunspell dictionary language
+        hunspell_data_dir: Directory containing the dictionary files,
+            if None the dictionaries packaged with cyhunspell are used
+
+    Returns:
+        Tuple of the .aff and .dic file paths
+    """
+    if hunspell_data_dir is None:
+        hunspell_data_dir = os.path.join(
+            os.path.dirname(hunspell.__file__), "dictionaries"
+        )
+    return tuple(
+        os.path.join(hunspell_data_dir, lang + extension)
+        for extension in [".aff", ".dic"]
+    )
+
+
+def hunspell_dictionary_version(lang="en_US", hunspell_data_dir=None):
+    """
+    Hash of the Hunspell dictionary files for a language, used to key the
+    spell cache so that corrections are redone if the dictionary changes
+
+    Args:
+        lang: Hunspell dictionary language
+        hunspell_data_dir: Directory containing the dictionary files,
+            if None the dictionaries packaged with cyhunspell are used
+
+    Returns:
+        Dictionary language followed by the hash of its .aff and .dic files
+    """
+    dictionary_hash = hashlib.md5()
+    for dictionary_file in hunspell_dictionary_files(lang, hunspell_data_dir):
+        if os.path.exists(dictionary_file):
+            with open(dictionary_file, "rb") as f:
+                dictionary_hash.update(f.read())
+    return f"{lang}_{dictionary_hash.hexdigest()[:10]}"
+
+
+def _spell_check_words(text_cleaner: TextCleaner, words: list) -> list:
+    """Spell check words in a worker process, saving
+    the corrections to the spell cache file if there is one"""
+    corrections = [text_cleaner.spell_check(word) for word in words]
+    text_cleaner.save_spell_cache()
+    return corrections
+
 
 class TokenTagger:
     def __init__(self):
 
-        spacy_udpipe.download("en")
-        self.nlp = spacy_udpipe.load("en")
+        self.nlp = udpipe_model("en")
+        # Changes whenever the tags could change
+        self.version = f"spacy_udpipe_{metadata.version('spacy-udpipe')}_en"
 
     def tag(self, sentence, convert_propn=True):
         """
@@ -72,6 +325,84 @@ class TokenTagger:
         else:
             return tags
 
+    def tag_many(self, texts, batch_size=1000, n_process=1, convert_propn=True):
+        """
+        Tokenise many sentences in batches with the UDPipe pipeline
+        and yield a list of tuples (text, lemma, POS) for each sentence
+
+        Args:
+            texts: Sentences to tag
+            batch_size: Number of sentences to process at a time
+            n_process: Number of processes to tag with
+            convert_propn: True to convert all proper nouns to nouns
+
+        Yields:
+            List of (text, lemma, POS) tuples for each sentence, in order
+        """
+        pos_conversions = {"PROPN": "NOUN"} if convert_propn else {}
+        for doc in self.nlp.pipe(texts, batch_size=batch_size, n_process=n_process):
+            yield [
+                (token.text, token.lemma_, pos_conversions.get(token.pos_, token.pos_))
+                for token in doc
+            ]
+
+    def __getstate__(self):
+        """Pickle without the UDPipe model, so that each
+        process using a TokenTagger uses its own (see udpipe_model)"""
+        return {}
+
+    def __setstate__(self, state):
+        self.__init__()
+
+
+# Cleaner and tagger of a clean_and_tag worker process,
+# created once when the worker starts
+_worker_text_cleaner = None
+_worker_token_tagger = None
+
+
+def _init_clean_and_tag_worker(text_cleaner: TextCleaner, token_tagger: TokenTagger):
+    global _worker_text_cleaner, _worker_token_tagger
+    _worker_text_cleaner = text_cleaner
+    _worker_token_tagger = token_tagger
+
+
+def _clean_and_tag_shard(texts: list) -> list:
+    tagged = clean_and_tag(texts, _worker_text_cleaner, _worker_token_tagger)
+    _worker_text_cleaner.save_spell_cache()
+    return tagged
+
+
+def clean_and_tag(
+    texts: list, text_cleaner: TextCleaner, token_tagger: TokenTagger, n_jobs: int = 1
+) -> list:
+    """Clean and part of speech tag texts, optionally sharding
+    the texts across a process pool
+
+    Args:
+        texts: Texts to clean and tag
+        text_cleaner: Class to clean text
+        token_tagger: Class to part of speech tag text
+        n_jobs: Number of processes to use. Each process creates its
+            own copy of text_cleaner and token_tagger once.
+
+    Returns:
+        List containing a list of (text, lemma, POS) tuples for each text,
+            in the same order as texts
+    """
+    texts = list(texts)
+    if n_jobs == 1:
+        return list(token_tagger.tag_many(text_cleaner.clean_many(texts)))
+    # Several shards per process so that the processes finish at similar times
+    shard_size = max(-(-len(texts) // (n_jobs * 4)), 1)
+    shards = [texts[i : i + shard_size] for i in range(0, len(texts), shard_size)]
+    with ProcessPoolExecutor(
+        max_workers=n_jobs,
+        initializer=_init_clean_and_tag_worker,
+        initargs=(text_cleaner, token_tagger),
+    ) as executor:
+        return list(chain.from_iterable(executor.map(_clean_and_tag_shard, shards)))
+
 
 class GloveDistances:
     def __init__(
@@ -79,12 +410,36 @@ class GloveDistances:
         masc_comparisons=["man", "he", "his", "masculine", "male"],
         fem_comparisons=["woman", "she", "her", "feminine", "female"],
         glove_d=100,
+        precision="float32",
     ):
         self.glove_path = os.environ.get("GLOVE_PATH")
         self.masc_comparisons = masc_comparisons
         self.fem_comparisons = fem_comparisons
         self.glove_d = glove_d  # 50, 100, 200, 300
         self.glove_txt_file = f"glove.6B.{self.glove_d}d.txt"
+        self.precision = precision  # float32, float16, int8
+        self.model = None
+        self.row_scales = None
+        self.score_table = None
+        self.fallback_to_full_model = False
+        self._full_model = None
+        self._comparison_vectors = None
+        self._shared_memory = []
+        self._owns_shared_memory = False
+
+    def _set_model(self, model: KeyedVectors):
+        """Set the GloVe model and clear anything precomputed from the previous one.
+        If a reduced precision is being used, the model vectors are replaced
+        with reduced precision vectors (see quantise_vectors)"""
+        self.model = model
+        self.row_scales = None
+        if model is not None and self.precision != "float32":
+            model.vectors, self.row_scales = quantise_vectors(
+                model.vectors, self.precision
+            )
+        self.score_table = None
+        self.fallback_to_full_model = False
+        self._comparison_vectors = None
 
     def load_glove2word2vec(self):
         output_file = os.path.join(self.glove_path, "gensim_" + self.glove_txt_file)
@@ -93,7 +448,417 @@ class GloveDistances:
             input_file = os.path.join(self.glove_path, self.glove_txt_file)
             glove2word2vec(input_file, word2vec_output_file=output_file)
 
-        self.model = KeyedVectors.load_word2vec_format(output_file, binary=False)
+        self._set_model(KeyedVectors.load_word2vec_format(output_file, binary=False))
+
+    def load_glove_mmap(self):
+        """
+        Load the GloVe vectors from a native gensim store (vocab index plus
+        a .npy vectors matrix), memory mapping the matrix read-only so that
+        start up is fast and concurrent processes share the same pages.
+
+        The store is created from the GloVe text file the first time this is run.
+        """
+        self._set_model(self._load_full_model())
+
+    def _load_full_model(self) -> KeyedVectors:
+        """Load the full GloVe model from the memory mapped gensim store,
+        creating the store if it does not exist yet"""
+        kv_file = os.path.join(self.glove_path, f"gensim_glove.6B.{self.glove_d}d.kv")
+        if not os.path.exists(kv_file):
+            print("Gensim binary store being prepared...")
+            input_file = os.path.join(self.glove_path, self.glove_txt_file)
+            model = KeyedVectors.load_word2vec_format(
+                input_file, binary=False, no_header=True
+            )
+            model.save(kv_file, separately=["vectors"])
+
+        return KeyedVectors.load(kv_file, mmap="r")
+
+    def share_model(self) -> dict:
+        """
+        Copy the loaded vectors (and int8 row scales) into shared memory
+        and point the model at the shared copy, so that worker processes
+        can attach to the same matrix with attach_shared_model rather than
+        each loading their own.
+
+        The shared memory is freed by release_shared_model, which should be
+        called by the process that shared the model once its workers are done.
+
+        Returns:
+            Picklable handle to pass to the workers
+        """
+        if self.model is None:
+            raise ValueError("Load a GloVe model before sharing it")
+        self.release_shared_model()
+        self.model.vectors, vectors_handle = self._to_shared_memory(self.model.vectors)
+        scales_handle = None
+        if self.row_scales is not None:
+            self.row_scales, scales_handle = self._to_shared_memory(self.row_scales)
+        self._owns_shared_memory = True
+        return {
+            "masc_comparisons": self.masc_comparisons,
+            "fem_comparisons": self.fem_comparisons,
+            "glove_d": self.glove_d,
+            "precision": self.precision,
+            "index_to_key": self.model.index_to_key,
+            "vectors": vectors_handle,
+            "row_scales": scales_handle,
+        }
+
+    @classmethod
+    def attach_shared_model(cls, handle: dict) -> "GloveDistances":
+        """
+        Create GloveDistances in a worker process using the vectors shared
+        by share_model. No vectors are copied or loaded from disk.
+
+        Args:
+            handle: Handle returned by share_model
+
+        Returns:
+            GloveDistances with the shared model loaded
+        """
+        glove_dists = cls(
+            masc_comparisons=handle["masc_comparisons"],
+            fem_comparisons=handle["fem_comparisons"],
+            glove_d=handle["glove_d"],
+            precision=handle["precision"],
+        )
+        vectors = glove_dists._from_shared_memory(handle["vectors"])
+        model = KeyedVectors(vector_size=vectors.shape[1], dtype=vectors.dtype)
+        model.index_to_key = handle["index_to_key"]
+        model.key_to_index = {key: i for i, key in enumerate(model.index_to_key)}
+        model.vectors = vectors
+        glove_dists.model = model
+        if handle["row_scales"] is not None:
+            glove_dists.row_scales = glove_dists._from_shared_memory(
+                handle["row_scales"]
+            )
+        return glove_dists
+
+    def release_shared_model(self):
+        """Detach from any shared memory, freeing it if this is the process
+        that shared it. The model is unloaded if it used the shared memory."""
+        if not self._shared_memory:
+            return
+        if self.model is not None:
+            self._set_model(None)
+        self.row_scales = None
+        for shm in self._shared_memory:
+            shm.close()
+            if self._owns_shared_memory:
+                shm.unlink()
+        self._shared_memory = []
+        self._owns_shared_memory = False
+
+    def _to_shared_memory(self, array: np.ndarray) -> Tuple[np.ndarray, dict]:
+        """Copy an array into a new shared memory block, returning the
+        shared array and the handle needed to attach to it"""
+        shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        self._shared_memory.append(shm)
+        shared_array = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)
+        shared_array[:] = array
+        return shared_array, {
+            "name": shm.name,
+            "shape": array.shape,
+            "dtype": array.dtype.str,
+        }
+
+    def _from_shared_memory(self, array_handle: dict) -> np.ndarray:
+        """Attach to an array shared by _to_shared_memory"""
+        shm = shared_memory.SharedMemory(name=array_handle["name"])
+        self._shared_memory.append(shm)
+        return np.ndarray(
+            array_handle["shape"], dtype=array_handle["dtype"], buffer=shm.buf
+        )
+
+    def subset_file(self) -> str:
+        """Path to the corpus subset of the GloVe model"""
+        return os.path.join(
+            self.glove_path, f"gensim_glove.6B.{self.glove_d}d_corpus_subset.kv"
+        )
+
+    def save_glove_subset(self, words: list, subset_file: Optional[str] = None):
+        """
+        Save a smaller GloVe model containing only the words given and the
+        comparison words, taken from the loaded model.
+
+        Args:
+            words: Words to keep (e.g. the vocab of the project corpora)
+            subset_file: Path to save the subset to.
+                Defaults to subset_file()
+        """
+        keep_words = set(words).union(self.masc_comparisons + self.fem_comparisons)
+        indices = np.sort(self.word_indices(list(keep_words)))
+        indices = indices[indices >= 0]
+
+        subset = KeyedVectors(vector_size=self.model.vector_size)
+        subset.add_vectors(
+            [self.model.index_to_key[index] for index in indices],
+            self.get_vectors(indices),
+        )
+        subset.save(subset_file or self.subset_file())
+
+    def load_glove_subset(
+        self, subset_file: Optional[str] = None, fallback_to_full_model: bool = True
+    ):
+        """
+        Load the corpus subset of the GloVe model made with save_glove_subset.
+
+        Args:
+            subset_file: Path to the subset. Defaults to subset_file()
+            fallback_to_full_model: If True, words that are not in the subset
+                are looked up in the full (memory mapped) GloVe model and their
+                vectors are added to the subset
+        """
+        self._set_model(KeyedVectors.load(subset_file or self.subset_file()))
+        self.fallback_to_full_model = fallback_to_full_model
+
+    def _add_from_full_model(self, words: list):
+        """Add the vectors of any of the words found in the full
+        GloVe model to the loaded model"""
+        if self._full_model is None:
+            self._full_model = self._load_full_model()
+        full_key_to_index = self._full_model.key_to_index
+        found_words = [word for word in words if word in full_key_to_index]
+        if found_words:
+            vectors, row_scales = quantise_vectors(
+                self._full_model[found_words], self.precision
+            )
+            self.model.add_vectors(found_words, vectors)
+            if row_scales is not None:
+                self.row_scales = np.concatenate([self.row_scales, row_scales])
+
+    def score_table_file(self) -> str:
+        """
+        Path to the masculine - feminine score table for the GloVe dimension
+        and comparison words being used
+        """
+        comparisons = "|".join(
+            [",".join(self.masc_comparisons), ",".join(self.fem_comparisons)]
+        )
+        comparisons_hash = hashlib.md5(comparisons.encode()).hexdigest()[:10]
+        return os.path.join(
+            self.glove_path,
+            f"gender_scores_glove.6B.{self.glove_d}d_{comparisons_hash}.pkl",
+        )
+
+    def save_score_table(self, chunk_size: int = 50000):
+        """
+        Score every word in the loaded GloVe vocab and save the scores as a
+        word: masculine - feminine float32 series, so that scoring can later be
+        done with a lookup and without loading the vectors
+
+        The table is shared by every precision, so it can only be made
+        from the float32 vectors.
+
+        Args:
+            chunk_size: Number of words to score at a time
+        """
+        if self.precision != "float32":
+            raise ValueError("The score table is made from the float32 vectors")
+        n_words = len(self.model.index_to_key)
+        scores = np.concatenate(
+            [
+                self._score_indices(np.arange(start, min(start + chunk_size, n_words)))
+                for start in range(0, n_words, chunk_size)
+            ]
+        )
+        pd.Series(scores, index=self.model.index_to_key, dtype=np.float32).to_pickle(
+            self.score_table_file()
+        )
+
+    def load_score_table(self):
+        """
+        Load only the word: masculine - feminine score table, the GloVe vectors
+        are not kept in memory. Scores can be looked up for any word in the
+        GloVe vocab but the comparison words can not be changed.
+
+        The table is created from the float32 GloVe vectors the first time
+        this is run, whatever the precision being used.
+        """
+        if not os.path.exists(self.score_table_file()):
+            print("Gender score table being prepared...")
+            float32_glove_dists = GloveDistances(
+                masc_comparisons=self.masc_comparisons,
+                fem_comparisons=self.fem_comparisons,
+                glove_d=self.glove_d,
+            )
+            float32_glove_dists.glove_path = self.glove_path
+            float32_glove_dists.load_glove_mmap()
+            float32_glove_dists.save_score_table()
+
+        self._set_model(None)
+        self.score_table = pd.read_pickle(self.score_table_file())
+
+    def comparison_vectors(self) -> np.ndarray:
+        """
+        Matrix (d x number of comparison words) of the unit length
+        masculine comparison vectors followed by the feminine comparison vectors.
+        This is calculated once per loaded model.
+        """
+        if self._comparison_vectors is None:
+            self._comparison_vectors = self._unit_vectors_matrix(
+                self.masc_comparisons + self.fem_comparisons
+            )
+        return self._comparison_vectors
+
+    def _unit_vectors_matrix(self, words: list) -> np.ndarray:
+        """Matrix (d x number of words) of the unit length vectors of words"""
+        vecs = self.get_vectors([self.model.key_to_index[word] for word in words])
+        vecs = vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+        return np.ascontiguousarray(vecs.T, dtype=np.float32)
+
+    def _cosine_similarities(
+        self, indices: np.ndarray, unit_vectors_matrix: np.ndarray
+    ) -> np.ndarray:
+        """Cosine similarities (number of indices x number of columns) between
+        the words at the given vocab row indices and unit length vectors"""
+        word_vecs = self.get_vectors(indices)
+        return (word_vecs @ unit_vectors_matrix) / np.linalg.norm(
+            word_vecs, axis=1, keepdims=True
+        )
+
+    def get_vectors(self, indices: np.ndarray) -> np.ndarray:
+        """Float32 vectors for the words at the given vocab row indices,
+        converted back from reduced precision if needed"""
+        vectors = np.asarray(self.model.vectors[indices], dtype=np.float32)
+        if self.row_scales is not None:
+            vectors *= self.row_scales[indices, np.newaxis]
+        return vectors
+
+    def _score_indices(self, indices: np.ndarray) -> np.ndarray:
+        """
+        Calculate the masculine - feminine cosine similarity averages for the
+        words at the given vocab row indices, using a single matrix product
+        against the precomputed comparison vectors.
+        If only the score table is loaded, the scores are looked up instead.
+        """
+        if self.score_table is not None:
+            return self.score_table.values[indices]
+
+        similarities = self._cosine_similarities(indices, self.comparison_vectors())
+        n_masc = len(self.masc_comparisons)
+        masc_av_similarities = similarities[:, :n_masc].mean(axis=1)
+        fem_av_similarities = similarities[:, n_masc:].mean(axis=1)
+        return masc_av_similarities - fem_av_similarities
+
+    def word_indices(self, words: list) -> np.ndarray:
+        """
+        Look up the row index of each word in the GloVe vocab using
+        the hash index of the model. Words not in the vocab get an index of -1.
+
+        If a corpus subset is loaded with fallback_to_full_model, missing words
+        are first added from the full GloVe model.
+        """
+        if self.score_table is not None:
+            return self.score_table.index.get_indexer(words).astype(np.int64)
+
+        indices = self._key_to_index_lookup(words)
+        missing = indices < 0
+        if self.fallback_to_full_model and missing.any():
+            missing_words = [word for word, miss in zip(words, missing) if miss]
+            self._add_from_full_model(missing_words)
+            indices[missing] = self._key_to_index_lookup(missing_words)
+        return indices
+
+    def _key_to_index_lookup(self, words: list) -> np.ndarray:
+        """Look up words in the hash index of the loaded model"""
+        key_to_index = self.model.key_to_index
+        return np.fromiter(
+            (key_to_index.get(word, -1) for word in words),
+            dtype=np.int64,
+            count=len(words),
+        )
+
+    def gender_similarity_difference_array(
+        self, words: list
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Calculate the masculine - feminine cosine similarity averages for
+        each word in a list. Each distinct word is looked up in the vocab once.
+
+        Args:
+            words: List of words (e.g. every token in a corpus). If the words
+                are categorical, each category is looked up once.
+
+        Returns:
+            A tuple of arrays aligned with words:
+                - masculine - feminine score (NaN if the word is not in the vocab)
+                - True if the word is in the vocab, False otherwise
+        """
+        codes, distinct_words = distinct_codes(words)
+        distinct_indices = self.word_indices(distinct_words)
+        distinct_in_vocab = distinct_indices >= 0
+
+        distinct_scores = np.full(len(distinct_words), np.nan, dtype=np.float32)
+        if distinct_in_vocab.any():
+            distinct_scores[distinct_in_vocab] = self._score_indices(
+                distinct_indices[distinct_in_vocab]
+            )
+
+        # Code -1 (a missing word) is not in the vocab
+        return (
+            np.append(distinct_scores, np.nan)[codes],
+            np.append(distinct_in_vocab, False)[codes],
+        )
+
+    def gender_similarity_difference_matrix(
+        self, words: list, comparison_pairs: list
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Calculate the masculine - feminine cosine similarity averages for each
+        word in a list, for several pairs of masculine and feminine comparison
+        word lists at once. The similarities to every distinct comparison word
+        are calculated with one matrix product and then averaged for each pair
+        with a second matrix product. Needs the GloVe vectors to be loaded.
+
+        Args:
+            words: List of words (e.g. every token in a corpus)
+            comparison_pairs: List of K (masculine comparisons,
+                feminine comparisons) tuples
+
+        Returns:
+            A tuple of arrays aligned with words:
+                - (number of words x K) masculine - feminine scores
+                    (NaN if the word is not in the vocab)
+                - True if the word is in the vocab, False otherwise
+        """
+        if self.model is None:
+            raise ValueError("GloVe vectors must be loaded to change comparison words")
+
+        comparison_words = list(
+            dict.fromkeys(word for masc, fem in comparison_pairs for word in masc + fem)
+        )
+        comparison_position = {word: i for i, word in enumerate(comparison_words)}
+        comparison_weights = np.zeros(
+            (len(comparison_words), len(comparison_pairs)), dtype=np.float32
+        )
+        for k, (masc, fem) in enumerate(comparison_pairs):
+            for word in masc:
+                comparison_weights[comparison_position[word], k] += 1 / len(masc)
+            for word in fem:
+                comparison_weights[comparison_position[word], k] -= 1 / len(fem)
+
+        codes, distinct_words = distinct_codes(words)
+        distinct_indices = self.word_indices(distinct_words)
+        distinct_in_vocab = distinct_indices >= 0
+
+        distinct_scores = np.full(
+            (len(distinct_words), len(comparison_pairs)), np.nan, dtype=np.float32
+        )
+        if distinct_in_vocab.any():
+            similarities = self._cosine_similarities(
+                distinct_indices[distinct_in_vocab],
+                self._unit_vectors_matrix(comparison_words),
+            )
+            distinct_scores[distinct_in_vocab] = similarities @ comparison_weights
+
+        # Code -1 (a missing word) is not in the vocab
+        missing_scores = np.full((1, len(comparison_pairs)), np.nan, dtype=np.float32)
+        return (
+            np.vstack([distinct_scores, missing_scores])[codes],
+            np.append(distinct_in_vocab, False)[codes],
+        )
 
     def gender_similarity_difference_word_list(self, word_list):
         """
@@ -105,35 +870,322 @@ class GloveDistances:
         if not isinstance(word_list, list):
             word_list = [word_list]
 
-        # There will be an error if the word isn't in the vocab
-        # also all words need to be lower case to be found in vocab
-        word_list = [
-            word.lower() for word in word_list if word in self.model.index_to_key
-        ]
+        scores, in_vocab = self.gender_similarity_difference_array(word_list)
 
-        if word_list:
-            word_vecs = self.model[word_list]
-
-            masc_av_similarities = np.array(
-                [
-                    self.model.cosine_similarities(self.model[word], word_vecs)
-                    for word in self.masc_comparisons
-                ]
-            ).mean(axis=0)
-            fem_av_similarities = np.array(
-                [
-                    self.model.cosine_similarities(self.model[word], word_vecs)
-                    for word in self.fem_comparisons
-                ]
-            ).mean(axis=0)
-
-            return dict(
-                zip(word_list, list(masc_av_similarities - fem_av_similarities))
-            )
+        if in_vocab.any():
+            words = np.array(word_list, dtype=object)[in_vocab]
+            return dict(zip(words, scores[in_vocab]))
         else:
             return None
 
 
+def quantise_vectors(
+    vectors: np.ndarray, precision: str, chunk_size: int = 50000
+) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Reduce the precision of a matrix of vectors to cut its memory use
+
+    Args:
+        vectors: Matrix of float32 vectors, one row per word
+        precision: "float32" (unchanged), "float16" or "int8".
+            For "int8", each row is scaled so its largest absolute value is 127
+        chunk_size: Number of rows to convert at a time, so that a memory
+            mapped matrix is not copied into memory in full
+
+    Returns:
+        A tuple of:
+            - the reduced precision vectors
+            - float32 scale of each row to convert int8 vectors
+                back (None unless precision is "int8")
+    """
+    if precision == "float32":
+        return vectors, None
+    if precision not in ["float16", "int8"]:
+        raise ValueError(f"precision must be float32, float16 or int8, not {precision}")
+
+    quantised = np.empty(vectors.shape, dtype=precision)
+    row_scales = np.ones(len(vectors), dtype=np.float32)
+    for start in range(0, len(vectors), chunk_size):
+        chunk = np.asarray(vectors[start : start + chunk_size], dtype=np.float32)
+        if precision == "float16":
+            quantised[start : start + chunk_size] = chunk
+        else:
+            scales = np.abs(chunk).max(axis=1) / INT8_MAX
+            scales[scales == 0] = 1
+            quantised[start : start + chunk_size] = np.round(
+                chunk / scales[:, np.newaxis]
+            )
+            row_scales[start : start + chunk_size] = scales
+    return quantised, row_scales if precision == "int8" else None
+
+
+def distinct_codes(values) -> Tuple[np.ndarray, pd.Index]:
+    """Integer code of each value and the distinct values (sorted, unless
+    the values are categorical, in which case the codes and categories
+    are used directly without hashing).
+
+    Args:
+        values: List, array, Series or Categorical of values
+
+    Returns:
+        A tuple of:
+            - code of each value (position in the distinct values,
+                -1 for a missing value such as None or NaN)
+            - distinct values
+    """
+    if isinstance(values, pd.Series) and isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.array
+    if isinstance(values, pd.Categorical):
+        return np.asarray(values.codes), values.categories
+    codes, distinct = pd.factorize(pd.Series(values, dtype=object), sort=True)
+    return codes, pd.Index(distinct)
+
+
+def shared_vocab(*word_columns) -> pd.Index:
+    """Sorted vocab of the distinct words (or categories)
+    of one or more word columns
+
+    Args:
+        *word_columns: Word columns e.g. the Word column
+            of several word_pos_corpus dataframes
+
+    Returns:
+        Sorted index of the words
+    """
+    vocab = pd.Index([], dtype=object)
+    for words in word_columns:
+        vocab = vocab.append(distinct_codes(words)[1])
+    return vocab.unique().sort_values()
+
+
+def vocab_codes(words, vocab: pd.Index) -> np.ndarray:
+    """Position of each word in a shared vocab (-1 if the word is
+    not in the vocab). Each distinct word is looked up once.
+
+    Args:
+        words: Word column
+        vocab: Vocab (see shared_vocab)
+
+    Returns:
+        int32 array of word IDs
+    """
+    codes, distinct = distinct_codes(words)
+    if distinct.equals(vocab):
+        return codes.astype(np.int32)
+    # Code -1 (a missing word) stays -1
+    return np.append(vocab.get_indexer(distinct), -1)[codes].astype(np.int32)
+
+
+def word_pos_cells(
+    word_pos_df: pd.DataFrame, vocab: pd.Index, pos_labels: pd.Index
+) -> np.ndarray:
+    """Position of each token in a flattened word x POS count matrix
+    (word ID * number of POS labels + POS ID). Tokens with a missing
+    word or POS are left out.
+
+    Args:
+        word_pos_df: Dataframe containing columns for 'Word' and 'POS'
+        vocab: Vocab (see shared_vocab)
+        pos_labels: POS labels (see shared_vocab)
+
+    Returns:
+        int64 array of matrix cells
+    """
+    word_codes = vocab_codes(word_pos_df["Word"], vocab)
+    pos_codes = vocab_codes(word_pos_df["POS"], pos_labels)
+    tagged = (word_codes >= 0) & (pos_codes >= 0)
+    return word_codes[tagged].astype(np.int64) * len(pos_labels) + pos_codes[tagged]
+
+
+class WordPosCounts:
+    """
+    Count of each word with each POS tag in one or more corpora. The
+    word x POS count matrix is built in one pass over the word and POS
+    codes, and the modal POS, counts and frequencies of the words are
+    all taken from it.
+
+    Args:
+        *word_pos_dfs: Dataframes containing columns for 'Word' and 'POS'
+    """
+
+    def __init__(self, *word_pos_dfs: pd.DataFrame):
+        self.vocab = shared_vocab(
+            *(word_pos_df["Word"] for word_pos_df in word_pos_dfs)
+        )
+        self.pos_labels = shared_vocab(
+            *(word_pos_df["POS"] for word_pos_df in word_pos_dfs)
+        )
+        self.n_tokens = sum(len(word_pos_df) for word_pos_df in word_pos_dfs)
+        n_cells = len(self.vocab) * len(self.pos_labels)
+        counts = np.zeros(n_cells, dtype=np.int64)
+        for word_pos_df in word_pos_dfs:
+            counts += np.bincount(
+                word_pos_cells(word_pos_df, self.vocab, self.pos_labels),
+                minlength=n_cells,
+            )
+        self.counts = counts.reshape(len(self.vocab), len(self.pos_labels))
+
+    @classmethod
+    def from_counts(
+        cls, counts: np.ndarray, vocab: pd.Index, pos_labels: pd.Index, n_tokens: int
+    ) -> "WordPosCounts":
+        """WordPosCounts from an already counted word x POS matrix
+
+        Args:
+            counts: Count of each word (row) with each POS tag (column)
+            vocab: Word of each row
+            pos_labels: POS tag of each column
+            n_tokens: Number of tokens in the corpora
+
+        Returns:
+            WordPosCounts
+        """
+        word_pos_counts = cls.__new__(cls)
+        word_pos_counts.vocab = vocab
+        word_pos_counts.pos_labels = pos_labels
+        word_pos_counts.n_tokens = n_tokens
+        word_pos_counts.counts = counts
+        return word_pos_counts
+
+    @property
+    def word_counts(self) -> np.ndarray:
+        """Count of each word in the vocab"""
+        return self.counts.sum(axis=1)
+
+    @property
+    def modal_pos(self) -> pd.Index:
+        """Most common POS of each word in the vocab. Ties are
+        broken by the first POS in sorted order, as pd.Series.mode does"""
+        return self.pos_labels[self.counts.argmax(axis=1)]
+
+    def word_freq(self, divide_by_pos_freq: bool = False) -> np.ndarray:
+        """Frequency of each word in the vocab, optionally divided by
+        the frequency of the word's most common POS"""
+        word_freq = self.word_counts / self.n_tokens
+        if divide_by_pos_freq:
+            pos_freq = self.counts.sum(axis=0) / self.n_tokens
+            return word_freq / pos_freq[self.counts.argmax(axis=1)]
+        return word_freq
+
+    def to_dict(self, values) -> dict:
+        """Dictionary of word: value for the words in the corpora
+
+        Args:
+            values: Value for each word in the vocab (e.g. word_counts)
+        """
+        observed = np.flatnonzero(self.word_counts)
+        return dict(
+            zip(self.vocab[observed].tolist(), np.asarray(values)[observed].tolist())
+        )
+
+
+class SubjectWordCounts:
+    """
+    Count of each word with each POS tag in the corpus of each subject,
+    built once from all the corpora as a sparse subjects x (word x POS)
+    matrix against a shared vocab. The frequency differences between
+    every pair of subjects are subtractions of the rows of the subjects
+    x vocab frequency matrix, and the combined POS, frequency and count
+    of the words in a pair come from summing the two subjects' rows.
+
+    Args:
+        subject_word_pos_corpora: Dictionary in the format
+            subject: Dataframe containing columns for 'Word' and 'POS'
+    """
+
+    def __init__(self, subject_word_pos_corpora: dict):
+        self.subjects = list(subject_word_pos_corpora)
+        corpora = list(subject_word_pos_corpora.values())
+        self.vocab = shared_vocab(*(corpus["Word"] for corpus in corpora))
+        self.pos_labels = shared_vocab(*(corpus["POS"] for corpus in corpora))
+        self.n_tokens = np.array([len(corpus) for corpus in corpora])
+
+        cells = [
+            word_pos_cells(corpus, self.vocab, self.pos_labels) for corpus in corpora
+        ]
+        rows = np.repeat(np.arange(len(corpora)), [len(c) for c in cells])
+        cells = np.concatenate(cells) if cells else np.array([], dtype=np.int64)
+        # Repeated (subject, cell) entries are summed
+        self.counts = sparse.csr_matrix(
+            (np.ones(len(cells), dtype=np.int64), (rows, cells)),
+            shape=(len(corpora), len(self.vocab) * len(self.pos_labels)),
+        )
+        self.word_counts = sparse.csr_matrix(
+            (
+                np.ones(len(cells), dtype=np.int64),
+                (rows, cells // max(len(self.pos_labels), 1)),
+            ),
+            shape=(len(corpora), len(self.vocab)),
+        )
+
+    def word_freq(self) -> np.ndarray:
+        """Subjects x vocab matrix of the frequency of each word in each subject"""
+        return self.word_counts.toarray() / self.n_tokens[:, np.newaxis]
+
+    def freq_differences(self) -> dict:
+        """Frequency differences of every word in the vocab between every
+        ordered pair of subjects
+
+        Returns:
+            Dictionary in the format
+                (subject 1, subject 2): subject 1 - subject 2 frequencies
+        """
+        word_freq = self.word_freq()
+        freq_differences = {}
+        for i, j in combinations(range(len(self.subjects)), 2):
+            difference = word_freq[i] - word_freq[j]
+            freq_differences[(self.subjects[i], self.subjects[j])] = difference
+            freq_differences[(self.subjects[j], self.subjects[i])] = -difference
+        return freq_differences
+
+    def pair_word_pos_counts(self, subject_1: str, subject_2: str) -> WordPosCounts:
+        """Word x POS counts of two subjects' corpora combined"""
+        rows = [self.subjects.index(subject_1), self.subjects.index(subject_2)]
+        counts = np.asarray(self.counts[rows].sum(axis=0)).reshape(
+            len(self.vocab), len(self.pos_labels)
+        )
+        return WordPosCounts.from_counts(
+            counts, self.vocab, self.pos_labels, int(self.n_tokens[rows].sum())
+        )
+
+    def word_comparisons(self) -> dict:
+        """Word frequency differences between every ordered pair of subjects,
+        with the POS label, frequency and count of each word in the pair's
+        corpora combined (see get_word_comparisons). The combined values
+        are calculated once for each pair and its mirror.
+
+        Returns:
+            Dictionary in the format
+                (subject 1, subject 2): DataFrame containing columns for:
+                    - Word (index)
+                    - subject1 - subject2 frequency difference
+                    - POS label
+                    - Word frequency (in both corpuses combined)
+                    - Word count
+        """
+        freq_differences = self.freq_differences()
+        word_comparisons = {}
+        for subject_1, subject_2 in combinations(self.subjects, 2):
+            word_pos_counts = self.pair_word_pos_counts(subject_1, subject_2)
+            word_counts = word_pos_counts.word_counts
+            observed = np.flatnonzero(word_counts)
+            pair_columns = {
+                "POS": word_pos_counts.modal_pos[observed].astype(str),
+                "Word freq": word_pos_counts.word_freq()[observed],
+                "Word count": word_counts[observed],
+            }
+            for sub1, sub2 in [(subject_1, subject_2), (subject_2, subject_1)]:
+                word_comparisons[(sub1, sub2)] = pd.DataFrame(
+                    {
+                        f"{sub1} - {sub2} freq": freq_differences[(sub1, sub2)][
+                            observed
+                        ],
+                        **pair_columns,
+                    },
+                    index=self.vocab[observed],
+                )
+        return word_comparisons
+
+
 def get_word_freq(word_pos_df: pd.DataFrame, divide_by_pos_freq: bool = False) -> dict:
     """
     Get the word frequencies for a corpus.
@@ -149,18 +1201,8 @@ def get_word_freq(word_pos_df: pd.DataFrame, divide_by_pos_freq: bool = False) -
         If divide_by_pos_freq is True, frequency is divided by
         frequency of the specific part of speech type in all corpus.
     """
-
-    pos_freq = (word_pos_df.groupby("POS").count() / len(word_pos_df))["Word"].to_dict()
-    word_pos = (
-        word_pos_df.groupby("Word")["POS"].agg(lambda x: pd.Series.mode(x)[0])
-    ).to_dict()
-    word_corpus_freq = (word_pos_df.groupby("Word").count() / len(word_pos_df))[
-        "POS"
-    ].to_dict()
-    word_corpus_freq_div_by_pos_freq = {
-        word: freq / pos_freq[word_pos[word]] for word, freq in word_corpus_freq.items()
-    }
-    return word_corpus_freq_div_by_pos_freq if divide_by_pos_freq else word_corpus_freq
+    word_pos_counts = WordPosCounts(word_pos_df)
+    return word_pos_counts.to_dict(word_pos_counts.word_freq(divide_by_pos_freq))
 
 
 def combined_pos_freq_and_count(
@@ -181,15 +1223,12 @@ def combined_pos_freq_and_count(
             - word: frequency across both subjects
             - word: count across both subjects
     """
-
-    pos_all_words = pd.concat([sub1_word_pos, sub2_word_pos]).reset_index(drop=True)
-    all_word_pos = (
-        pos_all_words.groupby("Word")["POS"].agg(lambda x: pd.Series.mode(x)[0])
-    ).to_dict()
-    word_counts = pos_all_words.groupby("Word").count()
-    all_word_booklet_freq = (word_counts / len(pos_all_words))["POS"].to_dict()
-    all_word_booklet_count = word_counts["POS"].to_dict()
-    return all_word_pos, all_word_booklet_freq, all_word_booklet_count
+    word_pos_counts = WordPosCounts(sub1_word_pos, sub2_word_pos)
+    return (
+        word_pos_counts.to_dict(word_pos_counts.modal_pos),
+        word_pos_counts.to_dict(word_pos_counts.word_freq()),
+        word_pos_counts.to_dict(word_pos_counts.word_counts),
+    )
 
 
 def subject_from_df(sub_word_pos: pd.DataFrame) -> str:
@@ -203,10 +1242,11 @@ def word_differences(
     all_word_pos: dict,
     all_word_booklet_freq: dict,
     all_word_booklet_count: dict,
-) -> dict:
-    """Create dictionary containing frequency difference between the two
+) -> pd.DataFrame:
+    """Create dataframe containing frequency difference between the two
     subjects, POS label, word frequency across the combined subjects, word
-    count across the combined subjects
+    count across the combined subjects. The values are aligned on the
+    (sorted) union of the words in the two subjects.
 
     Args:
         sub1_word_freq: Frequency of words in subject1
@@ -219,18 +1259,28 @@ def word_differences(
             both subjects
 
     Returns:
-        Dictionary in the format
-            word: (sub1 - sub2 frequency, POS, Word freq, Word count)
+        DataFrame containing columns for:
+            - Word (index)
+            - Freq difference: sub1 - sub2 frequency (float)
+            - POS (str)
+            - Word freq (float)
+            - Word count (int)
     """
-    return {
-        word: (
-            sub1_word_freq.get(word, 0) - sub2_word_freq.get(word, 0),
-            all_word_pos[word],
-            all_word_booklet_freq[word],
-            all_word_booklet_count[word],
-        )
-        for word in set(sub1_word_freq.keys()).union(set(sub2_word_freq.keys()))
-    }
+    words = pd.Index(list(sub1_word_freq)).union(pd.Index(list(sub2_word_freq)))
+    # Words that are not in a subject have a frequency of 0
+    sub1_freq = pd.Series(sub1_word_freq, dtype=float).reindex(words, fill_value=0)
+    sub2_freq = pd.Series(sub2_word_freq, dtype=float).reindex(words, fill_value=0)
+    return pd.DataFrame(
+        {
+            "Freq difference": sub1_freq - sub2_freq,
+            "POS": pd.Series(all_word_pos, dtype=str).reindex(words),
+            "Word freq": pd.Series(all_word_booklet_freq, dtype=float).reindex(words),
+            "Word count": pd.Series(all_word_booklet_count, dtype=np.int64).reindex(
+                words
+            ),
+        },
+        index=words,
+    )
 
 
 def get_word_comparisons(
@@ -267,23 +1317,90 @@ def get_word_comparisons(
     ) = combined_pos_freq_and_count(sub1_word_pos, sub2_word_pos)
 
     # Calculate the differences between the subjects
-    word_diffs = word_differences(
+    return word_differences(
         sub1_word_freq,
         sub2_word_freq,
         all_word_pos,
         all_word_booklet_freq,
         all_word_booklet_count,
+    ).rename(
+        columns={
+            "Freq difference": f"{subject_from_df(sub1_word_pos)} - "
+            f"{subject_from_df(sub2_word_pos)} freq"
+        }
     )
 
-    return pd.DataFrame(
-        word_diffs,
-        index=[
-            f"{subject_from_df(sub1_word_pos)} - {subject_from_df(sub2_word_pos)} freq",
-            "POS",
-            "Word freq",
-            "Word count",
-        ],
-    ).T
+
+def word_pos_corpus_key(
+    subject_descs: list, text_cleaner: TextCleaner, token_tagger: TokenTagger
+) -> str:
+    """Hash of the descriptions, the cleaner and tagger versions and the
+    cached columns, used to name the cached word_pos_corpus results"""
+    key = hashlib.md5(
+        f"{text_cleaner.version}|{token_tagger.version}|"
+        f"{','.join(WORD_POS_CACHE_COLUMNS)}".encode()
+    )
+    for text in subject_descs:
+        encoded_text = text.encode()
+        key.update(len(encoded_text).to_bytes(8, "little"))
+        key.update(encoded_text)
+    return key.hexdigest()
+
+
+def _word_pos_columns(
+    subject_descs: list,
+    text_cleaner: TextCleaner,
+    token_tagger: TokenTagger,
+    n_jobs: int,
+) -> dict:
+    """Clean and tag descriptions into arrays of the word, lemma,
+    POS and description position of each token"""
+    clean_tagged = clean_and_tag(subject_descs, text_cleaner, token_tagger, n_jobs)
+    clean_tagged_flatten = [
+        clean_tag for sublist in clean_tagged for clean_tag in sublist
+    ]
+    n_tokens = len(clean_tagged_flatten)
+    # Words and lemmas are interned against one sorted vocab
+    vocab_codes, vocab = pd.factorize(
+        np.array(
+            [tags[0].lower() for tags in clean_tagged_flatten]
+            + [tags[1].lower() for tags in clean_tagged_flatten],
+            dtype=object,
+        ),
+        sort=True,
+    )
+    pos_codes, pos_categories = pd.factorize(
+        np.array([tags[2] for tags in clean_tagged_flatten], dtype=object),
+        sort=True,
+    )
+    return {
+        "vocab": np.asarray(vocab, dtype=str),
+        "Word": vocab_codes[:n_tokens].astype(np.int32),
+        "Lemma": vocab_codes[n_tokens:].astype(np.int32),
+        "POS_categories": np.asarray(pos_categories, dtype=str),
+        "POS": pos_codes.astype(np.int32),
+        "Description": np.repeat(
+            np.arange(len(clean_tagged), dtype=np.int32),
+            [len(tags) for tags in clean_tagged],
+        ),
+    }
+
+
+def save_word_pos_columns(columns: dict, cache_file: str):
+    """Save the word_pos_corpus columns (vocab, int32 codes and
+    description positions) to a .npz file"""
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    # Write to a temporary file first so that a partly written
+    # file is never read by another process
+    tmp_file = f"{cache_file}.{os.getpid()}.tmp.npz"
+    np.savez(tmp_file, **columns)
+    os.replace(tmp_file, cache_file)
+
+
+def load_word_pos_columns(cache_file: str) -> dict:
+    """Load word_pos_corpus columns saved by save_word_pos_columns"""
+    with np.load(cache_file) as arrays:
+        return {name: arrays[name] for name in arrays.files}
 
 
 def word_pos_corpus(
@@ -291,10 +1408,12 @@ def word_pos_corpus(
     text_cleaner: TextCleaner,
     token_tagger: TokenTagger,
     subject_label: str,
-    lemma: bool = False,
+    description_index: bool = False,
+    n_jobs: int = 1,
+    cache_dir: Optional[str] = None,
 ) -> pd.DataFrame:
     """Turn subject descriptions into a dataframe containing
-    columns for Word, POS, Corpus
+    columns for Word, Lemma, POS, Corpus
 
     Args:
         subject_descs: List of subject descriptions
@@ -302,24 +1421,56 @@ def word_pos_corpus(
         token_tagger: Class to part of speech tag text
         subject_label: Subject label that the descriptions are from
             e.g Geo, CS, Drama
-        lemma: True to use lemmatized words,
-            False to use the words from the descriptions
+        description_index: True to add a Description column containing
+            the position in subject_descs of the description each word is from,
+            and an n_descriptions frame attribute (attrs) holding
+            len(subject_descs), which includes descriptions with no words
+        n_jobs: Number of processes to clean and tag the descriptions with
+        cache_dir: If not None, the cleaned and tagged words are saved to
+            and loaded from this directory, keyed by the descriptions,
+            and the cleaner and tagger versions (see word_pos_corpus_key)
 
     Returns:
-        Dataframe containing columns for Word, POS, Corpus
+        Dataframe containing columns for Word, Lemma, POS, Corpus
+            (and Description if description_index is True).
+            Word and Lemma are categorical with the same categories
+            (the sorted vocab of words and lemmas), POS and Corpus
+            are categorical.
     """
-    clean_text = [text_cleaner.clean(text) for text in subject_descs]
-    clean_tagged = [token_tagger.tag(text) for text in clean_text]
-    clean_tagged_flatten = [
-        clean_tag for sublist in clean_tagged for clean_tag in sublist
-    ]
-    word_or_lemma_index = 1 if lemma else 0
-    return pd.DataFrame(
+    subject_descs = list(subject_descs)
+    if cache_dir is None:
+        columns = _word_pos_columns(subject_descs, text_cleaner, token_tagger, n_jobs)
+    else:
+        key = word_pos_corpus_key(subject_descs, text_cleaner, token_tagger)
+        cache_file = os.path.join(cache_dir, f"{key}.npz")
+        if os.path.exists(cache_file):
+            columns = load_word_pos_columns(cache_file)
+        else:
+            columns = _word_pos_columns(
+                subject_descs, text_cleaner, token_tagger, n_jobs
+            )
+            save_word_pos_columns(columns, cache_file)
+    vocab = pd.Index(columns["vocab"])
+    word_pos_df = pd.DataFrame(
         {
-            "Word": [
-                tags[word_or_lemma_index].lower() for tags in clean_tagged_flatten
-            ],
-            "POS": [tags[2] for tags in clean_tagged_flatten],
-            "Corpus": [subject_label] * len(clean_tagged_flatten),
+            "Word": pd.Categorical.from_codes(columns["Word"], categories=vocab),
+            "Lemma": pd.Categorical.from_codes(columns["Lemma"], categories=vocab),
+            "POS": pd.Categorical.from_codes(
+                columns["POS"], categories=pd.Index(columns["POS_categories"])
+            ),
+            "Corpus": pd.Categorical.from_codes(
+                np.zeros(len(columns["Word"]), dtype=np.int8),
+                categories=[subject_label],
+            ),
         }
     )
+    if description_index:
+        word_pos_df["Description"] = columns["Description"].astype(int)
+        word_pos_df.attrs["n_descriptions"] = len(subject_descs)
+    return word_pos_df
+
+
+def lemmas_as_words(word_pos_df: pd.DataFrame) -> pd.DataFrame:
+    """Replace the Word column of a word_pos_corpus dataframe with the
+    Lemma column, so that functions using the Word column use lemmas"""
+    return word_pos_df.assign(Word=word_pos_df["Lemma"])
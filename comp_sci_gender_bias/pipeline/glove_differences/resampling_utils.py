@@ -0,0 +1,228 @@
+"""
+Utils for resampling course descriptions to measure the uncertainty
+in mean gender differences
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from typing import Optional, Tuple, Union
+
+
+def description_score_sums(
+    description_ids: np.ndarray,
+    group_ids: np.ndarray,
+    scores: np.ndarray,
+    n_descriptions: int,
+    n_groups: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Sum the scores and count the scored words in each description
+    for each group (e.g. POS). Words with a NaN score or a
+    negative group id are not included.
+
+    Args:
+        description_ids: Description that each word is from
+        group_ids: Group that each word is in
+        scores: Score of each word (e.g. male - female)
+        n_descriptions: Number of descriptions
+        n_groups: Number of groups
+
+    Returns:
+        A tuple of (n_descriptions x n_groups) arrays:
+            - sum of the scores
+            - number of scored words
+    """
+    keep = ~np.isnan(scores) & (group_ids >= 0)
+    cells = description_ids[keep] * n_groups + group_ids[keep]
+    size = n_descriptions * n_groups
+    sums = np.bincount(cells, weights=scores[keep], minlength=size)
+    counts = np.bincount(cells, minlength=size).astype(float)
+    return sums.reshape(n_descriptions, n_groups), counts.reshape(
+        n_descriptions, n_groups
+    )
+
+
+def resample_weights(
+    rng: np.random.Generator, n_resamples: int, n_descriptions: int
+) -> np.ndarray:
+    """Number of times each description is picked in each bootstrap resample
+
+    Args:
+        rng: Random number generator
+        n_resamples: Number of resamples
+        n_descriptions: Number of descriptions
+
+    Returns:
+        (n_resamples x n_descriptions) array of counts
+    """
+    picks = rng.integers(0, n_descriptions, size=(n_resamples, n_descriptions))
+    picks += np.arange(n_resamples)[:, np.newaxis] * n_descriptions
+    return np.bincount(picks.ravel(), minlength=n_resamples * n_descriptions).reshape(
+        n_resamples, n_descriptions
+    )
+
+
+def bootstrap_mean_ci(
+    sums: np.ndarray,
+    counts: np.ndarray,
+    n_resamples: int = 10000,
+    ci: float = 0.95,
+    seed: Optional[int] = None,
+    chunk_size: int = 1000,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Bootstrap confidence intervals for the mean score of each group,
+    resampling descriptions (rather than words) with replacement.
+
+    Each resample is a weighting of the descriptions, so the sums and counts
+    of every resample are calculated with a matrix product.
+
+    Args:
+        sums: (n_descriptions x n_groups) sum of the scores
+            (see description_score_sums)
+        counts: (n_descriptions x n_groups) number of scored words
+        n_resamples: Number of bootstrap resamples
+        ci: Confidence level of the intervals
+        seed: Seed for the random number generator
+        chunk_size: Number of resamples to calculate at a time
+
+    Returns:
+        A tuple of arrays, one value for each group:
+            - lower bound of the confidence interval
+            - upper bound of the confidence interval
+    """
+    rng = np.random.default_rng(seed)
+    n_descriptions = len(sums)
+    resampled_means = []
+    for start in range(0, n_resamples, chunk_size):
+        weights = resample_weights(
+            rng, min(chunk_size, n_resamples - start), n_descriptions
+        )
+        with np.errstate(invalid="ignore", divide="ignore"):
+            resampled_means.append((weights @ sums) / (weights @ counts))
+    tail = (1 - ci) / 2 * 100
+    return tuple(
+        np.nanpercentile(np.concatenate(resampled_means), [tail, 100 - tail], axis=0)
+    )
+
+
+def mean_difference(
+    first_sums: np.ndarray,
+    first_counts: np.ndarray,
+    second_sums: np.ndarray,
+    second_counts: np.ndarray,
+) -> np.ndarray:
+    """Difference between the mean score of two sets of words
+    (NaN where either set has no words)"""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return first_sums / first_counts - second_sums / second_counts
+
+
+def count_extreme_permutations(
+    sums: np.ndarray,
+    counts: np.ndarray,
+    n_first: int,
+    observed: np.ndarray,
+    n_permutations: int,
+    seed: Union[int, np.random.SeedSequence, None] = None,
+    chunk_size: int = 1000,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Count the permutations of the description labels which give a difference
+    in mean score between the two sets of descriptions at least as large
+    (in absolute value) as the observed difference. Permutations which leave
+    a set with no words in a group (a NaN difference) are not counted.
+
+    Args:
+        sums: (n_descriptions x n_groups) sum of the scores, with the
+            descriptions of the first set followed by the second set
+        counts: (n_descriptions x n_groups) number of scored words
+        n_first: Number of descriptions in the first set
+        observed: Observed difference in mean score for each group
+        n_permutations: Number of permutations
+        seed: Seed for the random number generator
+        chunk_size: Number of permutations to calculate at a time
+
+    Returns:
+        A tuple of arrays, one value for each group:
+            - number of permutations at least as extreme as observed
+            - number of permutations with a difference (not NaN)
+    """
+    rng = np.random.default_rng(seed)
+    total_sums = sums.sum(axis=0)
+    total_counts = counts.sum(axis=0)
+    labels = np.arange(len(sums)) < n_first
+    n_extreme = np.zeros(sums.shape[1], dtype=int)
+    n_valid = np.zeros(sums.shape[1], dtype=int)
+    for start in range(0, n_permutations, chunk_size):
+        n_chunk = min(chunk_size, n_permutations - start)
+        first = rng.permuted(np.tile(labels, (n_chunk, 1)), axis=1).astype(float)
+        first_sums = first @ sums
+        first_counts = first @ counts
+        differences = mean_difference(
+            first_sums,
+            first_counts,
+            total_sums - first_sums,
+            total_counts - first_counts,
+        )
+        n_extreme += (np.abs(differences) >= np.abs(observed)).sum(axis=0)
+        n_valid += (~np.isnan(differences)).sum(axis=0)
+    return n_extreme, n_valid
+
+
+def permutation_test(
+    first_sums: np.ndarray,
+    first_counts: np.ndarray,
+    second_sums: np.ndarray,
+    second_counts: np.ndarray,
+    n_permutations: int = 100000,
+    seed: Optional[int] = None,
+    chunk_size: int = 1000,
+    n_jobs: int = 1,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Two sided permutation test of the difference in mean score between
+    two sets of descriptions (e.g. two subjects), shuffling which set each
+    description belongs to.
+
+    Args:
+        first_sums: (n_first_descriptions x n_groups) sum of the scores
+            in the first set of descriptions (see description_score_sums)
+        first_counts: (n_first_descriptions x n_groups) number of
+            scored words in the first set of descriptions
+        second_sums: Sum of the scores in the second set of descriptions
+        second_counts: Number of scored words in the second set of descriptions
+        n_permutations: Number of permutations
+        seed: Seed for the random number generator
+        chunk_size: Number of permutations to calculate at a time
+        n_jobs: Number of processes to split the permutations across
+
+    Returns:
+        A tuple of arrays, one value for each group:
+            - observed difference in mean score (first - second)
+            - p-value (NaN if either set has no words in the group)
+    """
+    sums = np.vstack([first_sums, second_sums])
+    counts = np.vstack([first_counts, second_counts])
+    observed = mean_difference(
+        first_sums.sum(axis=0),
+        first_counts.sum(axis=0),
+        second_sums.sum(axis=0),
+        second_counts.sum(axis=0),
+    )
+
+    seeds = np.random.SeedSequence(seed).spawn(n_jobs)
+    job_permutations = [
+        n_permutations // n_jobs + (job < n_permutations % n_jobs)
+        for job in range(n_jobs)
+    ]
+    job_args = [
+        (sums, counts, len(first_sums), observed, n, job_seed, chunk_size)
+        for n, job_seed in zip(job_permutations, seeds)
+    ]
+    if n_jobs == 1:
+        n_extreme, n_valid = count_extreme_permutations(*job_args[0])
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            n_extreme, n_valid = np.sum(
+                list(executor.map(count_extreme_permutations, *zip(*job_args))),
+                axis=0,
+            )
+    p_values = (n_extreme + 1) / (n_valid + 1)
+    return observed, np.where(np.isnan(observed), np.nan, p_values)
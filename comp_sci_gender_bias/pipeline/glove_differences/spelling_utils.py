@@ -0,0 +1,178 @@
+"""
+Utils for fast spelling suggestions using a symmetric delete (SymSpell) index
+of the Hunspell dictionary, ranked by GloVe word frequency
+"""
+
+import hashlib
+from collections import defaultdict
+from itertools import combinations
+from typing import Iterable, Optional
+
+
+def dictionary_stems(dic_file: str) -> list:
+    """Words in a Hunspell .dic file without their affix flags
+
+    Args:
+        dic_file: Path to the Hunspell .dic file
+
+    Returns:
+        List of the dictionary words
+    """
+    with open(dic_file, encoding="utf-8", errors="ignore") as f:
+        # The first line is the number of words
+        lines = f.read().splitlines()[1:]
+    return [line.split("/")[0].strip() for line in lines if line.strip()]
+
+
+def edit_distance(word: str, candidate: str, max_distance: int) -> int:
+    """Damerau-Levenshtein (optimal string alignment) distance between two
+    words, returning max_distance + 1 once the distance is over max_distance"""
+    if abs(len(word) - len(candidate)) > max_distance:
+        return max_distance + 1
+    previous_previous_row = None
+    previous_row = list(range(len(candidate) + 1))
+    for i, word_char in enumerate(word, 1):
+        row = [i] + [0] * len(candidate)
+        for j, candidate_char in enumerate(candidate, 1):
+            row[j] = min(
+                previous_row[j] + 1,
+                row[j - 1] + 1,
+                previous_row[j - 1] + (word_char != candidate_char),
+            )
+            if (
+                i > 1
+                and j > 1
+                and word_char == candidate[j - 2]
+                and word[i - 2] == candidate_char
+            ):
+                row[j] = min(row[j], previous_previous_row[j - 2] + 1)
+        if min(row) > max_distance:
+            return max_distance + 1
+        previous_previous_row, previous_row = previous_row, row
+    return previous_row[-1]
+
+
+class SymSpellSuggester:
+    """
+    Spelling suggestions from a symmetric delete index: every dictionary word
+    is indexed under all the strings made by deleting up to max_edit_distance
+    characters from its prefix, so the candidates for a misspelt word are
+    found with a few dictionary lookups of its own deletes. Candidates are
+    ranked by edit distance and then by their rank in word_ranks (e.g. GloVe
+    vocab order, which is most frequent first).
+
+    Can be used as the suggestion_backend of TextCleaner.
+
+    Args:
+        words: Dictionary words
+        word_ranks: Rank of words (lower is more frequent), words without
+            a rank are suggested after words with a rank
+        max_edit_distance: Maximum edit distance of suggestions
+        prefix_length: Number of characters at the start of each word
+            that are indexed
+    """
+
+    def __init__(
+        self,
+        words: Iterable[str],
+        word_ranks: Optional[dict] = None,
+        max_edit_distance: int = 2,
+        prefix_length: int = 7,
+    ):
+        self.max_edit_distance = max_edit_distance
+        self.prefix_length = prefix_length
+        word_ranks = {} if word_ranks is None else word_ranks
+        self.words = sorted(
+            {word.lower() for word in words},
+            key=lambda word: (word_ranks.get(word, len(word_ranks)), word),
+        )
+        # Changes whenever the suggestions could change, including
+        # the dictionary words and their ranking
+        words_hash = hashlib.md5("\n".join(self.words).encode()).hexdigest()[:10]
+        self.version = f"symspell_d{max_edit_distance}_p{prefix_length}_{words_hash}"
+        self.deletes = defaultdict(list)
+        # Words are added in rank order, so the words under each delete
+        # are in rank order
+        for word_id, word in enumerate(self.words):
+            for delete in self._prefix_deletes(word):
+                self.deletes[delete].append(word_id)
+
+    @classmethod
+    def from_hunspell(
+        cls,
+        hunspell,
+        dic_file: str,
+        ranked_words: list,
+        n_ranked_words: int = 100000,
+        **kwargs,
+    ) -> "SymSpellSuggester":
+        """
+        Build a suggester from the words in a Hunspell .dic file plus the
+        most frequent words in ranked_words that Hunspell spells correctly
+        (the .dic file does not include inflected forms such as plurals)
+
+        Args:
+            hunspell: Hunspell object for the dictionary
+            dic_file: Path to the Hunspell .dic file
+            ranked_words: Words in order of frequency, for example
+                GloveDistances.model.index_to_key
+            n_ranked_words: Number of the most frequent ranked words to check
+            **kwargs: Passed to SymSpellSuggester
+
+        Returns:
+            SymSpellSuggester
+        """
+        frequent_words = [
+            word
+            for word in ranked_words[:n_ranked_words]
+            if word.isalpha() and hunspell.spell(word)
+        ]
+        word_ranks = {word: rank for rank, word in enumerate(frequent_words)}
+        return cls(
+            dictionary_stems(dic_file) + frequent_words,
+            word_ranks=word_ranks,
+            **kwargs,
+        )
+
+    def _prefix_deletes(self, word: str) -> set:
+        """The word's prefix with up to max_edit_distance characters deleted"""
+        prefix = word[: self.prefix_length]
+        deletes = {prefix}
+        for n_deletes in range(1, min(self.max_edit_distance, len(prefix)) + 1):
+            for positions in combinations(range(len(prefix)), n_deletes):
+                deletes.add(
+                    "".join(char for i, char in enumerate(prefix) if i not in positions)
+                )
+        return deletes
+
+    def suggest(self, word: str) -> list:
+        """
+        Dictionary words within max_edit_distance of a word, closest first
+        and then in rank order. Suggestions are capitalised if the word is.
+
+        Args:
+            word: Word to find suggestions for
+
+        Returns:
+            List of suggestions
+        """
+        lower_word = word.lower()
+        candidate_ids = {
+            word_id
+            for delete in self._prefix_deletes(lower_word)
+            for word_id in self.deletes.get(delete, [])
+        }
+        distances = {}
+        for word_id in candidate_ids:
+            distance = edit_distance(
+                lower_word, self.words[word_id], self.max_edit_distance
+            )
+            if distance <= self.max_edit_distance:
+                distances[word_id] = distance
+        suggestions = [
+            self.words[word_id]
+            for word_id in sorted(distances, key=lambda i: (distances[i], i))
+        ]
+        if word[:1].isupper():
+            return [suggestion.capitalize() for suggestion in suggestions]
+        return suggestions
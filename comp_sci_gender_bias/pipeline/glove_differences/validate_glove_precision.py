@@ -0,0 +1,107 @@
+from comp_sci_gender_bias.pipeline.glove_differences.process_text_utils import (
+    TokenTagger,
+    TextCleaner,
+    SPELL_CACHE_FILE,
+    WORD_POS_CACHE_DIR,
+    N_JOBS,
+    GloveDistances,
+    word_pos_corpus,
+)
+from comp_sci_gender_bias.pipeline.glove_differences.make_differences import (
+    GLOVE_DIMENSIONS,
+)
+from comp_sci_gender_bias.getters.course_descriptions import course_descriptions
+from comp_sci_gender_bias.utils.io import make_path_if_not_exist
+from comp_sci_gender_bias import PROJECT_DIR
+import numpy as np
+import pandas as pd
+
+PRECISIONS = ["float16", "int8"]
+SAVE_DIR = PROJECT_DIR / "outputs/tables/glove_precision"
+
+
+def precision_deviations(
+    word_pos_corpora: dict, precisions: list = PRECISIONS
+) -> pd.DataFrame:
+    """Compare the male - female scores calculated using reduced precision
+    GloVe vectors to the scores calculated using float32 GloVe vectors
+
+    Args:
+        word_pos_corpora: Dictionary in the format
+            (data source, subject label): Dataframe containing columns for
+            Word, POS, Corpus
+        precisions: Reduced precisions to compare to float32
+
+    Returns:
+        Dataframe with columns for:
+            - precision
+            - data_source
+            - subject
+            - max_abs_deviation: largest absolute difference in
+                the male - female score of a word in the corpus
+            - mean_abs_deviation: mean absolute difference in
+                the male - female score of the words in the corpus
+            - mean_gender_diff_abs_deviation: absolute difference in
+                the mean male - female score of the corpus
+            The deviations are NaN for a corpus with no words in the GloVe vocab
+    """
+    float32_glove_dists = GloveDistances(glove_d=GLOVE_DIMENSIONS)
+    float32_glove_dists.load_glove_mmap()
+
+    deviations = []
+    for precision in precisions:
+        glove_dists = GloveDistances(glove_d=GLOVE_DIMENSIONS, precision=precision)
+        glove_dists.load_glove_mmap()
+        for (data_source, subject), corpus in word_pos_corpora.items():
+            words = corpus["Word"]
+            (
+                float32_scores,
+                in_vocab,
+            ) = float32_glove_dists.gender_similarity_difference_array(words)
+            scores, _ = glove_dists.gender_similarity_difference_array(words)
+            if in_vocab.any():
+                abs_deviation = np.abs(scores[in_vocab] - float32_scores[in_vocab])
+                max_abs_deviation = abs_deviation.max()
+                mean_abs_deviation = abs_deviation.mean()
+                mean_gender_diff_abs_deviation = abs(
+                    scores[in_vocab].mean() - float32_scores[in_vocab].mean()
+                )
+            else:
+                # No words in the corpus are in the GloVe vocab
+                max_abs_deviation = mean_abs_deviation = np.nan
+                mean_gender_diff_abs_deviation = np.nan
+            deviations.append(
+                {
+                    "precision": precision,
+                    "data_source": data_source,
+                    "subject": subject,
+                    "max_abs_deviation": max_abs_deviation,
+                    "mean_abs_deviation": mean_abs_deviation,
+                    "mean_gender_diff_abs_deviation": mean_gender_diff_abs_deviation,
+                }
+            )
+    return pd.DataFrame(deviations)
+
+
+if __name__ == "__main__":
+    text_cleaner = TextCleaner(spell_cache_file=SPELL_CACHE_FILE)
+    token_tagger = TokenTagger()
+
+    word_pos_corpora = {
+        (data_source, subject_label): word_pos_corpus(
+            subject_descs=descs,
+            text_cleaner=text_cleaner,
+            token_tagger=token_tagger,
+            subject_label=subject_label,
+            n_jobs=N_JOBS,
+            cache_dir=WORD_POS_CACHE_DIR,
+        )
+        for data_source, subject_descriptions in course_descriptions().items()
+        for subject_label, descs in subject_descriptions.items()
+    }
+    text_cleaner.save_spell_cache()
+
+    deviations = precision_deviations(word_pos_corpora)
+    print(deviations.to_string(index=False))
+    make_path_if_not_exist(SAVE_DIR)
+    deviations.to_csv(SAVE_DIR / "precision_deviations.csv", index=False)
@@ -0,0 +1,155 @@
+from comp_sci_gender_bias.pipeline.glove_differences.process_text_utils import (
+    TextCleaner,
+    GloveDistances,
+    hunspell_dictionary_files,
+)
+from comp_sci_gender_bias.pipeline.glove_differences.spelling_utils import (
+    SymSpellSuggester,
+)
+from comp_sci_gender_bias.pipeline.glove_differences.make_differences import (
+    GLOVE_DIMENSIONS,
+)
+from comp_sci_gender_bias.getters.course_descriptions import course_descriptions
+from comp_sci_gender_bias.utils.io import make_path_if_not_exist
+from comp_sci_gender_bias import PROJECT_DIR
+from collections import Counter
+import pandas as pd
+import time
+
+SAVE_DIR = PROJECT_DIR / "outputs/tables/spelling_suggestions"
+
+
+def unknown_word_counts(descs: list, text_cleaner: TextCleaner) -> Counter:
+    """Count the words in descriptions that would be spelling corrected
+    by TextCleaner (words Hunspell does not know, that are not short
+    words, abbreviations or acronyms)
+
+    Args:
+        descs: List of descriptions
+        text_cleaner: Class to clean text
+
+    Returns:
+        Counter of the unknown words
+    """
+    word_counts = Counter(
+        word
+        for desc in descs
+        for word in text_cleaner.strip_nonalphanumeric(desc).split()
+        if len(word) > 3 and not word.isupper()
+    )
+    return Counter(
+        {
+            word: count
+            for word, count in word_counts.items()
+            if not text_cleaner.hunspell.spell(word)
+        }
+    )
+
+
+def first_suggestion(suggestions) -> str:
+    """First spelling suggestion or "" if there are none"""
+    return suggestions[0] if suggestions else ""
+
+
+def suggestion_differences(
+    word_counts: Counter, text_cleaner: TextCleaner, suggester: SymSpellSuggester
+) -> pd.DataFrame:
+    """Compare the first Hunspell suggestion to the first SymSpell suggestion
+    for each word
+
+    Args:
+        word_counts: Counter of the words to compare
+        text_cleaner: Class to clean text, containing Hunspell
+        suggester: SymSpell suggester
+
+    Returns:
+        Dataframe with columns for:
+            - word
+            - count: number of times the word is in the corpora
+            - hunspell_suggestion
+            - symspell_suggestion
+            - same: whether the first suggestions are the same
+    """
+    words = list(word_counts)
+    hunspell_suggestions = [
+        first_suggestion(text_cleaner.hunspell.suggest(word)) for word in words
+    ]
+    symspell_suggestions = [first_suggestion(suggester.suggest(word)) for word in words]
+    suggestions = pd.DataFrame(
+        {
+            "word": words,
+            "count": [word_counts[word] for word in words],
+            "hunspell_suggestion": hunspell_suggestions,
+            "symspell_suggestion": symspell_suggestions,
+        }
+    )
+    suggestions["same"] = (
+        suggestions["hunspell_suggestion"] == suggestions["symspell_suggestion"]
+    )
+    return suggestions.sort_values("count", ascending=False)
+
+
+def suggestion_timings(words: list, suggest_functions: dict) -> dict:
+    """Mean time in microseconds taken to suggest spellings for each word
+
+    Args:
+        words: Words to suggest spellings for
+        suggest_functions: Dictionary in the format
+            name: function returning the spelling suggestions for a word
+
+    Returns:
+        Dictionary in the format name: mean microseconds per word
+    """
+    timings = {}
+    for name, suggest in suggest_functions.items():
+        start = time.perf_counter()
+        for word in words:
+            suggest(word)
+        timings[name] = (time.perf_counter() - start) / max(len(words), 1) * 1e6
+    return timings
+
+
+if __name__ == "__main__":
+    text_cleaner = TextCleaner()
+    glove_dists = GloveDistances(glove_d=GLOVE_DIMENSIONS)
+    glove_dists.load_glove_mmap()
+    _, dic_file = hunspell_dictionary_files(
+        text_cleaner.lang, text_cleaner.hunspell_data_dir
+    )
+    suggester = SymSpellSuggester.from_hunspell(
+        text_cleaner.hunspell, dic_file, glove_dists.model.index_to_key
+    )
+
+    word_counts = sum(
+        (
+            unknown_word_counts(descs, text_cleaner)
+            for subject_descriptions in course_descriptions().values()
+            for descs in subject_descriptions.values()
+        ),
+        Counter(),
+    )
+    suggestions = suggestion_differences(word_counts, text_cleaner, suggester)
+    timings = suggestion_timings(
+        list(word_counts),
+        {"hunspell": text_cleaner.hunspell.suggest, "symspell": suggester.suggest},
+    )
+
+    summary = pd.DataFrame(
+        [
+            {
+                "distinct_words": len(suggestions),
+                "distinct_words_differ": (~suggestions["same"]).sum(),
+                "distinct_words_differ_pct": 100 * (~suggestions["same"]).mean(),
+                "occurrences": suggestions["count"].sum(),
+                "occurrences_differ_pct": 100
+                * suggestions.loc[~suggestions["same"], "count"].sum()
+                / max(suggestions["count"].sum(), 1),
+                "hunspell_microseconds_per_word": timings["hunspell"],
+                "symspell_microseconds_per_word": timings["symspell"],
+            }
+        ]
+    )
+    print(summary.to_string(index=False))
+    make_path_if_not_exist(SAVE_DIR)
+    summary.to_csv(SAVE_DIR / "suggestion_compatibility.csv", index=False)
+    suggestions.to_csv(SAVE_DIR / "suggestion_differences.csv", index=False)
@@ -4,7 +4,11 @@ from comp_sci_gender_bias.pipeline.glove_differences.make_differences import (
 from comp_sci_gender_bias.pipeline.glove_differences.process_text_utils import (
     TokenTagger,
     TextCleaner,
+    SPELL_CACHE_FILE,
     GloveDistances,
+    WORD_POS_CACHE_DIR,
+    N_JOBS,
+    word_pos_corpus,
 )
 from comp_sci_gender_bias.getters.scraped_data import scraped_data
 from comp_sci_gender_bias.getters.dfe_combined_school_data import (
@@ -17,7 +21,6 @@ from comp_sci_gender_bias.utils.process_pandas import (
 )
 from comp_sci_gender_bias.utils.io import make_path_if_not_exist
 from comp_sci_gender_bias import PROJECT_DIR
-from statistics import mean
 
 GLOVE_DIMENSIONS = 300
 
@@ -40,45 +43,78 @@ SUBJECT_COLS = ["CompSci", "Geography", "Drama"]
 SCHOOL_LVL_SAVE_DIR = PROJECT_DIR / "outputs/school_level"
 
 
-def mean_gender_cosine_difference(text: str, lemma: bool = False) -> float:
+def mean_gender_cosine_differences(
+    texts: list, lemma: bool = False, n_jobs: int = 1
+) -> list:
     """Calculate the mean gender cosine difference of all the words
-    in the input text.
+    in each of the input texts, cleaning and tagging the texts across
+    n_jobs processes. The cleaned and tagged words are cached in
+    WORD_POS_CACHE_DIR (see word_pos_corpus).
 
     Args:
-        text: School GCSE subject text
-        lemma: If True will use the lemmas of the words in the text,
-            if False will use the words in the text
+        texts: School GCSE subject texts
+        lemma: If True will use the lemmas of the words in the texts,
+            if False will use the words in the texts
+        n_jobs: Number of processes to clean and tag the texts with
 
     Returns:
-        Mean gender cosine difference value
+        List of the mean gender cosine difference value of each text
     """
-    clean_text = text_cleaner.clean(text)
-    tags = token_tagger.tag(clean_text)
-    word_or_lemma_index = 1 if lemma else 0
-    words_list = [tag[word_or_lemma_index].lower() for tag in tags]
-    word_male_minus_fem_distances = glove_dists.gender_similarity_difference_word_list(
-        words_list
+    texts = list(texts)
+    text_word_pos = word_pos_corpus(
+        subject_descs=texts,
+        text_cleaner=text_cleaner,
+        token_tagger=token_tagger,
+        subject_label="",
+        description_index=True,
+        n_jobs=n_jobs,
+        cache_dir=WORD_POS_CACHE_DIR,
+    )
+    word_or_lemma = "Lemma" if lemma else "Word"
+    scores, _ = glove_dists.gender_similarity_difference_array(
+        text_word_pos[word_or_lemma]
+    )
+    # The mean is over the distinct words in each text
+    return (
+        text_word_pos.assign(score=scores.astype(float))
+        .dropna()
+        .drop_duplicates(["Description", word_or_lemma])
+        .groupby("Description")["score"]
+        .mean()
+        .reindex(range(len(texts)))
+        .tolist()
     )
-    return mean(word_male_minus_fem_distances.values())
 
 
 if __name__ == "__main__":
     glove_dists = GloveDistances(glove_d=GLOVE_DIMENSIONS)
-    glove_dists.load_glove2word2vec()
-    text_cleaner = TextCleaner()
+    glove_dists.load_score_table()
+    text_cleaner = TextCleaner(spell_cache_file=SPELL_CACHE_FILE)
     token_tagger = TokenTagger()
 
     dfe_data = dfe_combined_school_data()
     urn_web = urn_website_lookup().pipe(clean_website_col, "SchoolWebsite")
     scraped_school_descs = scraped_data().pipe(clean_website_col, "Website")
-    school_urn = scraped_school_descs.merge(
-        right=urn_web, how="left", left_on="Website", right_on="SchoolWebsite"
-    ).drop(columns="SchoolWebsite")
 
-    for mean_gender_sim_col, subject_col in zip(MEAN_GENDER_SIM_COLS, SUBJECT_COLS):
-        school_urn[mean_gender_sim_col] = school_urn[subject_col].apply(
-            mean_gender_cosine_difference
+    # Score the descriptions in the same order as the other pipelines
+    # so that the cached cleaned and tagged words are reused
+    mean_gender_sims = {
+        mean_gender_sim_col: mean_gender_cosine_differences(
+            scraped_school_descs[subject_col], n_jobs=N_JOBS
         )
+        for mean_gender_sim_col, subject_col in zip(MEAN_GENDER_SIM_COLS, SUBJECT_COLS)
+    }
+    text_cleaner.save_spell_cache()
+
+    school_urn = (
+        scraped_school_descs.assign(**mean_gender_sims)
+        .merge(right=urn_web, how="left", left_on="Website", right_on="SchoolWebsite")
+        .drop(columns="SchoolWebsite")
+    )
+    school_urn = school_urn[
+        [col for col in school_urn.columns if col not in MEAN_GENDER_SIM_COLS]
+        + MEAN_GENDER_SIM_COLS
+    ]
 
     school_urn_dfe = school_urn.merge(
         right=dfe_data,
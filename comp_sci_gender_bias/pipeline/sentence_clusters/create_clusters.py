@@ -4,7 +4,6 @@ import pandas as pd
 import seaborn as sns
 from sentence_transformers import SentenceTransformer
 from sklearn.decomposition import TruncatedSVD
-import spacy_udpipe
 from toolz import pipe
 from typing import List, Iterable
 from umap import UMAP
@@ -12,6 +11,7 @@ from umap import UMAP
 from comp_sci_gender_bias import PROJECT_DIR
 from comp_sci_gender_bias.getters.scraped_data import scraped_data_no_extra_whitespace
 from comp_sci_gender_bias.utils.io import make_path_if_not_exist
+from comp_sci_gender_bias.utils.udpipe_models import udpipe_model
 
 
 SUBJECTS = ["cs", "geo", "drama"]
@@ -39,6 +39,7 @@ def generate_sents(
         Dataframe where one column has sentences from the course descriptions
         and the other contains the unique ID of the description.
     """
+    nlp = udpipe_model("en")
     description_ids = []
     sents = []
     for idx, desc in zip(index, descriptions):
@@ -126,7 +127,7 @@ def get_n_tokens(texts: List[str]) -> List[int]:
     Returns:
         lengths: Token count in each document.
     """
-    docs = nlp.pipe(texts)
+    docs = udpipe_model("en").pipe(texts)
     lengths = [len(d) for d in docs]
     return lengths
 
@@ -142,9 +143,6 @@ if __name__ == "__main__":
 
     if proceed.lower() == "y":
 
-        spacy_udpipe.download("en")
-        nlp = spacy_udpipe.load("en")
-
         for subject in SUBJECTS:
             sents = scraped_sents(subject)
             sent_embeddings = embed(list(sents["sentence"])).astype("double")
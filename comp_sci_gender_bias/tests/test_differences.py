@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+from comp_sci_gender_bias.pipeline.glove_differences.make_differences import (
+    top_n_by_pos_group,
+    save_top_n_differences,
+)
+
+word_diffs_df = pd.DataFrame(
+    {
+        "CS - Geo freq": [0.1, 0.5, 0.3, 0.2, 0.4, 0.3, 0.6],
+        "POS": ["NOUN", "NOUN", "ADJ", "NOUN", "ADV", "NOUN", "PROPN"],
+    },
+    index=["data", "code", "fast", "world", "quickly", "map", "python"],
+)
+
+
+def test_top_n_by_pos_group():
+    top_n_dfs = top_n_by_pos_group(word_diffs_df, "CS - Geo freq", 2)
+
+    assert list(top_n_dfs) == ["noun", "adjadv", "verb"]
+    assert top_n_dfs["noun"].index.tolist() == ["code", "map"]
+    assert top_n_dfs["adjadv"].index.tolist() == ["quickly", "fast"]
+    assert top_n_dfs["noun"].equals(word_diffs_df.loc[["code", "map"]])
+    # A POS that is in no group is not in any of the results
+    assert not any("python" in top_n_df.index for top_n_df in top_n_dfs.values())
+    # An empty group keeps the columns
+    assert top_n_dfs["verb"].empty
+    assert top_n_dfs["verb"].columns.equals(word_diffs_df.columns)
+
+
+def test_top_n_by_pos_group_ties():
+    tied_df = pd.DataFrame(
+        {"CS - Geo freq": [0.2, 0.3, 0.2, 0.2], "POS": ["NOUN"] * 4},
+        index=["a", "b", "c", "d"],
+    )
+    # Tied rows are kept in their original order
+    assert top_n_by_pos_group(tied_df, "CS - Geo freq", 3)["noun"].index.tolist() == [
+        "b",
+        "a",
+        "c",
+    ]
+
+
+def test_top_n_by_pos_group_duplicate_index():
+    duplicate_df = pd.DataFrame(
+        {"CS - Geo freq": [0.1, 0.3, 0.2], "POS": ["NOUN", "VERB", "NOUN"]},
+        index=["run", "run", "map"],
+    )
+    top_n_dfs = top_n_by_pos_group(duplicate_df, "CS - Geo freq", 5)
+
+    assert top_n_dfs["noun"].equals(duplicate_df.iloc[[2, 0]])
+    assert top_n_dfs["verb"].equals(duplicate_df.iloc[[1]])
+
+
+def test_top_n_by_pos_group_matches_query_sort_head():
+    rng = np.random.default_rng(0)
+    random_df = pd.DataFrame(
+        {
+            "CS - Geo freq": rng.permutation(200) / 200,
+            "POS": rng.choice(["NOUN", "ADJ", "ADV", "VERB", "AUX"], 200),
+        },
+        index=[f"word{i}" for i in range(200)],
+    )
+    top_n_dfs = top_n_by_pos_group(random_df, "CS - Geo freq", 20)
+    for query, lbl in zip(
+        ["POS == 'NOUN'", "POS in ['ADJ', 'ADV']", "POS == 'VERB'"],
+        ["noun", "adjadv", "verb"],
+    ):
+        assert top_n_dfs[lbl].equals(
+            random_df.query(query)
+            .sort_values("CS - Geo freq", ascending=False)
+            .head(20)
+        )
+
+
+def test_save_top_n_differences(tmp_path):
+    save_top_n_differences(
+        {("CS", "Geo"): word_diffs_df}, "bit", "Word", top_n=2, save_dir=tmp_path
+    )
+
+    noun_df = pd.read_csv(tmp_path / "CS_Geo_diff_noun_bit_data_word.csv")
+    assert noun_df["Word"].tolist() == ["code", "map"]
+    # Groups with no words are saved with only the header
+    assert (
+        tmp_path / "CS_Geo_diff_verb_bit_data_word.csv"
+    ).read_text() == "Word,CS - Geo freq,POS\n"
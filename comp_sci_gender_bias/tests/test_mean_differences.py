@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+from types import SimpleNamespace
+from comp_sci_gender_bias.pipeline.glove_differences import make_mean_differences
+from comp_sci_gender_bias.pipeline.glove_differences.make_mean_differences import (
+    description_pos_score_sums,
+    word_removal_masks,
+    POS_GROUPS,
+    POS_LABELS,
+)
+
+word_scores = {"boy": 1.0, "girl": -1.0, "runs": 0.5, "code": 0.25, "data": -0.5}
+cs_specific_words = {"crucial": ["code"], "optional": ["code", "data"]}
+glove_dists = SimpleNamespace(
+    gender_similarity_difference_array=lambda words: (
+        np.array([word_scores.get(word, np.nan) for word in words]),
+        np.array([word in word_scores for word in words]),
+    )
+)
+
+
+def subject_word_pos(words, pos, descriptions, n_descriptions, subject="Drama"):
+    word_pos_df = pd.DataFrame(
+        {
+            "Word": pd.Categorical(words),
+            "POS": pd.Categorical(pos),
+            "Corpus": pd.Categorical([subject] * len(words)),
+            "Description": descriptions,
+        }
+    )
+    word_pos_df.attrs["n_descriptions"] = n_descriptions
+    return word_pos_df
+
+
+def test_description_pos_score_sums():
+    # Descriptions 1 and 3 have no words
+    word_pos_df = subject_word_pos(
+        ["boy", "girl", "runs", "boy"],
+        ["NOUN", "NOUN", "VERB", "NOUN"],
+        [0, 2, 2, 2],
+        4,
+    )
+    sums, counts = description_pos_score_sums(
+        word_pos_df, glove_dists, "Drama", word_removals=[None]
+    )
+    # Columns are Noun, Adj/Adv, Verb
+    assert np.array_equal(
+        sums, [[1.0, 0.0, 0.0], [0.0, 0.0, 0.0], [0.0, 0.0, 0.5], [0.0, 0.0, 0.0]]
+    )
+    assert np.array_equal(
+        counts, [[1.0, 0.0, 0.0], [0.0, 0.0, 0.0], [2.0, 0.0, 1.0], [0.0, 0.0, 0.0]]
+    )
+
+    explicit_sums, _ = description_pos_score_sums(
+        word_pos_df, glove_dists, "Drama", word_removals=[None], n_descriptions=5
+    )
+    assert explicit_sums.shape == (5, 3)
+
+
+def test_description_pos_score_sums_empty_corpus():
+    word_pos_df = subject_word_pos([], [], np.array([], dtype=int), 2)
+    sums, counts = description_pos_score_sums(
+        word_pos_df, glove_dists, "Drama", word_removals=[None, None]
+    )
+    assert sums.shape == counts.shape == (2, 6)
+    assert not counts.any()
+
+
+def test_description_pos_score_sums_without_n_descriptions():
+    word_pos_df = subject_word_pos(["boy", "girl"], ["NOUN", "NOUN"], [0, 2], 4)
+    word_pos_df.attrs = {}
+    sums, _ = description_pos_score_sums(
+        word_pos_df, glove_dists, "Drama", word_removals=[None]
+    )
+    assert np.array_equal(sums[:, 0], [1.0, 0.0, -1.0])
+
+    empty_word_pos_df = word_pos_df.iloc[:0]
+    sums, _ = description_pos_score_sums(
+        empty_word_pos_df, glove_dists, "Drama", word_removals=[None]
+    )
+    assert sums.shape == (0, 3)
+
+
+def test_description_pos_score_sums_missing_word():
+    word_pos_df = subject_word_pos(
+        ["boy", None, "girl"], ["NOUN", "NOUN", "NOUN"], [0, 0, 1], 2
+    )
+    sums, counts = description_pos_score_sums(
+        word_pos_df, glove_dists, "Drama", word_removals=[None]
+    )
+    assert np.array_equal(sums, [[1.0, 0.0, 0.0], [-1.0, 0.0, 0.0]])
+    assert np.array_equal(counts, [[1.0, 0.0, 0.0], [1.0, 0.0, 0.0]])
+
+
+def test_word_removal_masks(monkeypatch):
+    monkeypatch.setattr(
+        make_mean_differences,
+        "subject_specific_words",
+        lambda subject, specific_word_type: cs_specific_words[specific_word_type],
+    )
+    vocab = pd.Index(["boy", "code", "data"])
+    removed = [[False, True, False], [False, True, True], [False, False, False]]
+    for subject in ["CS", "cs"]:
+        assert (
+            word_removal_masks(vocab, subject, ["crucial", "optional", None]).tolist()
+            == removed
+        )
+    # Only subjects with subject specific terminology have words removed
+    assert not word_removal_masks(vocab, "Drama", ["crucial", "optional"]).any()
+
+
+def test_description_pos_score_sums_word_removals(monkeypatch):
+    monkeypatch.setattr(
+        make_mean_differences,
+        "subject_specific_words",
+        lambda subject, specific_word_type: cs_specific_words[specific_word_type],
+    )
+    word_pos_df = subject_word_pos(
+        ["code", "boy", "data", "runs", "code", "girl", "data", "unknown"],
+        ["NOUN", "NOUN", "NOUN", "VERB", "VERB", "ADJ", "ADV", "NOUN"],
+        [0, 0, 0, 0, 1, 1, 2, 2],
+        3,
+        subject="CS",
+    )
+    word_removals = ["crucial", "optional", None]
+    sums, counts = description_pos_score_sums(
+        word_pos_df, glove_dists, "CS", word_removals=word_removals
+    )
+
+    assert sums.shape == counts.shape == (3, len(word_removals) * len(POS_LABELS))
+    for i, word_removal in enumerate(word_removals):
+        removed_words = cs_specific_words.get(word_removal, [])
+        kept = word_pos_df[~word_pos_df["Word"].isin(removed_words)]
+        kept = kept.assign(
+            Score=kept["Word"].astype(object).map(word_scores),
+            Group=kept["POS"].astype(object).map(POS_GROUPS),
+        ).dropna(subset=["Score"])
+        for description in range(3):
+            for j, pos_label in enumerate(POS_LABELS):
+                cell = kept[
+                    (kept["Description"] == description) & (kept["Group"] == pos_label)
+                ]
+                column = i * len(POS_LABELS) + j
+                assert np.isclose(sums[description, column], cell["Score"].sum())
+                assert counts[description, column] == len(cell)
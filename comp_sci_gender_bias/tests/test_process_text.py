@@ -1,14 +1,25 @@
 import pandas as pd
+import numpy as np
+import os
+import pytest
+from types import SimpleNamespace
+from concurrent.futures import ProcessPoolExecutor
 from comp_sci_gender_bias.pipeline.glove_differences.process_text_utils import (
     TokenTagger,
     TextCleaner,
     GloveDistances,
+    quantise_vectors,
     get_word_freq,
     get_word_comparisons,
     combined_pos_freq_and_count,
     subject_from_df,
     word_differences,
     word_pos_corpus,
+    lemmas_as_words,
+    shared_vocab,
+    WordPosCounts,
+    SubjectWordCounts,
+    vocab_codes,
 )
 
 geo_word_pos = pd.DataFrame(
@@ -39,6 +50,20 @@ def test_TokenTagger():
     assert tags[0][2] == "PROPN"
 
 
+def test_TokenTagger_shares_model():
+    assert TokenTagger().nlp is token_tagger.nlp
+
+
+def test_TokenTagger_tag_many():
+    sentences = ["London is in England", "", "Computer science uses computers"]
+    assert list(token_tagger.tag_many(sentences, batch_size=2)) == [
+        token_tagger.tag(sentence) for sentence in sentences
+    ]
+    assert list(token_tagger.tag_many(sentences, convert_propn=False)) == [
+        token_tagger.tag(sentence, convert_propn=False) for sentence in sentences
+    ]
+
+
 def test_CleanText():
     cleaned_text = text_cleaner.clean("clean_me!!1")
     assert cleaned_text == "clean me 1"
@@ -52,6 +77,46 @@ def test_CleanText():
     assert text_cleaner.clean(text) == text
 
 
+def test_TextCleaner_spell_cache():
+    text_cleaner = TextCleaner(spell_cache_size=2)
+    text = "change thsi and thsi but not THSI"
+    assert text_cleaner.clean(text) == "change this and this but not THSI"
+    cache_info = text_cleaner.spell_cache_info()
+    # "and", "but" and "not" are too short and "THSI" is an acronym so
+    # only "change" and "thsi" are checked
+    assert cache_info.misses == 2
+    assert cache_info.hits == 1
+    assert cache_info.currsize == 2
+
+
+def test_TextCleaner_spell_cache_file(tmp_path):
+    spell_cache_file = str(tmp_path / "spell_cache.sqlite")
+    text_cleaner = TextCleaner(spell_cache_file=spell_cache_file)
+    assert text_cleaner.clean("change thsi") == "change this"
+    text_cleaner.save_spell_cache()
+
+    # Saved corrections are used without calling Hunspell
+    text_cleaner = TextCleaner(spell_cache_file=spell_cache_file)
+    text_cleaner.hunspell = None
+    assert text_cleaner.clean("change thsi") == "change this"
+
+
+def test_TextCleaner_clean_many(tmp_path):
+    texts = ["clean_me!!1", "change thsi but not THSI", "a cta and dgo", ""]
+    cleaned_texts = [text_cleaner.clean(text) for text in texts]
+    assert text_cleaner.clean_many(texts) == cleaned_texts
+
+    spell_cache_file = str(tmp_path / "spell_cache.sqlite")
+    pool_text_cleaner = TextCleaner(spell_cache_file=spell_cache_file)
+    assert pool_text_cleaner.clean_many(texts, n_jobs=2) == cleaned_texts
+    # Corrections made in the worker processes are saved to the cache
+    assert TextCleaner(spell_cache_file=spell_cache_file)._saved_corrections == {
+        "clean": "clean",
+        "change": "change",
+        "thsi": "this",
+    }
+
+
 def test_GloveDistances():
 
     glove_dists = GloveDistances()
@@ -74,6 +139,226 @@ def test_GloveDistances():
     assert "notawordkd" not in some_scores
 
 
+def test_GloveDistances_gender_similarity_difference_array():
+    glove_dists = GloveDistances()
+    glove_dists.load_glove_mmap()
+
+    words = ["mother", "notawordkd", "father", "mother"]
+    scores, in_vocab = glove_dists.gender_similarity_difference_array(words)
+    word_list_scores = glove_dists.gender_similarity_difference_word_list(words)
+
+    assert list(in_vocab) == [True, False, True, True]
+    assert np.isnan(scores[1])
+    assert scores[0] == scores[3] == word_list_scores["mother"]
+    assert scores[2] == word_list_scores["father"]
+
+
+def test_GloveDistances_gender_similarity_difference_missing_word():
+    glove_dists = GloveDistances()
+    glove_dists.load_glove_mmap()
+
+    words = ["father", None, "mother", np.nan]
+    scores, in_vocab = glove_dists.gender_similarity_difference_array(words)
+    matrix_scores, matrix_in_vocab = glove_dists.gender_similarity_difference_matrix(
+        words, [(glove_dists.masc_comparisons, glove_dists.fem_comparisons)]
+    )
+
+    assert list(in_vocab) == list(matrix_in_vocab) == [True, False, True, False]
+    assert np.isnan(scores[[1, 3]]).all()
+    assert np.isnan(matrix_scores[[1, 3]]).all()
+    assert list(glove_dists.gender_similarity_difference_word_list(words)) == [
+        "father",
+        "mother",
+    ]
+
+
+def test_GloveDistances_gender_similarity_difference_matrix():
+    glove_dists = GloveDistances()
+    glove_dists.load_glove_mmap()
+    he_she_glove_dists = GloveDistances(
+        masc_comparisons=["he"], fem_comparisons=["she"]
+    )
+    he_she_glove_dists.load_glove_mmap()
+
+    words = ["mother", "notawordkd", "father"]
+    scores, in_vocab = glove_dists.gender_similarity_difference_matrix(
+        words,
+        [
+            (glove_dists.masc_comparisons, glove_dists.fem_comparisons),
+            (["he"], ["she"]),
+        ],
+    )
+    default_scores, _ = glove_dists.gender_similarity_difference_array(words)
+    he_she_scores, _ = he_she_glove_dists.gender_similarity_difference_array(words)
+
+    assert scores.shape == (3, 2)
+    assert list(in_vocab) == [True, False, True]
+    assert np.isnan(scores[1]).all()
+    assert np.allclose(scores[in_vocab, 0], default_scores[in_vocab])
+    assert np.allclose(scores[in_vocab, 1], he_she_scores[in_vocab])
+
+
+def test_GloveDistances_comparison_vectors():
+    glove_dists = GloveDistances()
+    glove_dists.load_glove_mmap()
+    model = glove_dists.model
+
+    assert glove_dists.comparison_vectors().shape == (100, 10)
+
+    father_score = glove_dists.gender_similarity_difference_word_list("father")
+    masc_similarities = [
+        model.cosine_similarities(model[word], model[["father"]])[0]
+        for word in glove_dists.masc_comparisons
+    ]
+    fem_similarities = [
+        model.cosine_similarities(model[word], model[["father"]])[0]
+        for word in glove_dists.fem_comparisons
+    ]
+    assert np.isclose(
+        father_score["father"], np.mean(masc_similarities) - np.mean(fem_similarities)
+    )
+
+
+def test_GloveDistances_load_score_table():
+    glove_dists = GloveDistances()
+    glove_dists.load_glove_mmap()
+    glove_dists_table = GloveDistances()
+    glove_dists_table.load_score_table()
+
+    assert glove_dists_table.model is None
+    assert glove_dists_table.score_table.dtype == np.float32
+
+    words = ["mother", "notawordkd", "father"]
+    scores, in_vocab = glove_dists.gender_similarity_difference_array(words)
+    table_scores, table_in_vocab = glove_dists_table.gender_similarity_difference_array(
+        words
+    )
+    assert list(table_in_vocab) == list(in_vocab)
+    assert np.allclose(table_scores[in_vocab], scores[in_vocab])
+
+
+def test_GloveDistances_load_score_table_precision(tmp_path, monkeypatch):
+    # Build the table under tmp_path, not in the GLOVE_PATH directory
+    monkeypatch.setattr(
+        GloveDistances, "score_table_file", lambda self: str(tmp_path / "scores.pkl")
+    )
+    comparisons = {
+        "masc_comparisons": ["man", "he"],
+        "fem_comparisons": ["woman", "she"],
+    }
+    glove_dists = GloveDistances(**comparisons)
+    glove_dists.load_glove_mmap()
+    int8_glove_dists = GloveDistances(**comparisons, precision="int8")
+    # The table is made from the float32 vectors
+    int8_glove_dists.load_score_table()
+    words = ["mother", "father"]
+    assert np.array_equal(
+        int8_glove_dists.gender_similarity_difference_array(words)[0],
+        glove_dists.gender_similarity_difference_array(words)[0],
+    )
+    assert os.path.exists(tmp_path / "scores.pkl")
+
+    int8_glove_dists.load_glove_mmap()
+    with pytest.raises(ValueError):
+        int8_glove_dists.save_score_table()
+
+
+def test_GloveDistances_load_glove_subset(tmp_path):
+    subset_file = str(tmp_path / "subset.kv")
+    glove_dists = GloveDistances()
+    glove_dists.load_glove_mmap()
+    glove_dists.save_glove_subset(["mother", "notawordkd"], subset_file=subset_file)
+
+    glove_dists_subset = GloveDistances()
+    glove_dists_subset.load_glove_subset(
+        subset_file=subset_file, fallback_to_full_model=False
+    )
+    assert len(glove_dists_subset.model) == 11
+    assert glove_dists_subset.gender_similarity_difference_word_list("father") is None
+
+    glove_dists_subset.load_glove_subset(subset_file=subset_file)
+    words = ["mother", "father", "notawordkd"]
+    scores, in_vocab = glove_dists.gender_similarity_difference_array(words)
+    subset_scores, subset_in_vocab = (
+        glove_dists_subset.gender_similarity_difference_array(words)
+    )
+    assert list(subset_in_vocab) == list(in_vocab)
+    assert np.allclose(subset_scores[in_vocab], scores[in_vocab])
+
+
+def test_GloveDistances_precision():
+    glove_dists = GloveDistances()
+    glove_dists.load_glove_mmap()
+    words = ["mother", "father", "notawordkd"]
+    scores, in_vocab = glove_dists.gender_similarity_difference_array(words)
+
+    for precision in ["float16", "int8"]:
+        glove_dists_precision = GloveDistances(precision=precision)
+        glove_dists_precision.load_glove_mmap()
+        assert glove_dists_precision.model.vectors.dtype == precision
+
+        (
+            precision_scores,
+            precision_in_vocab,
+        ) = glove_dists_precision.gender_similarity_difference_array(words)
+        assert list(precision_in_vocab) == list(in_vocab)
+        assert np.allclose(
+            precision_scores[in_vocab], scores[in_vocab], atol=0.01, rtol=0
+        )
+
+
+def shared_model_scores(handle, words):
+    glove_dists = GloveDistances.attach_shared_model(handle)
+    scores, _ = glove_dists.gender_similarity_difference_array(words)
+    glove_dists.release_shared_model()
+    return scores
+
+
+def test_GloveDistances_share_model():
+    words = ["mother", "father", "notawordkd"]
+    for precision in ["float32", "int8"]:
+        glove_dists = GloveDistances(precision=precision)
+        glove_dists.load_glove_mmap()
+        scores, in_vocab = glove_dists.gender_similarity_difference_array(words)
+
+        handle = glove_dists.share_model()
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            worker_scores = list(
+                executor.map(shared_model_scores, [handle] * 2, [words] * 2)
+            )
+        for shared_scores in worker_scores:
+            assert np.array_equal(shared_scores, scores, equal_nan=True)
+
+        shared_scores, _ = glove_dists.gender_similarity_difference_array(words)
+        assert np.array_equal(shared_scores, scores, equal_nan=True)
+        glove_dists.release_shared_model()
+        assert glove_dists.model is None
+
+
+def test_quantise_vectors():
+    vectors = np.array([[0.5, -1.0, 0.25], [0, 0, 0]], dtype=np.float32)
+
+    float16_vectors, float16_scales = quantise_vectors(vectors, "float16")
+    assert float16_vectors.dtype == np.float16
+    assert float16_scales is None
+
+    int8_vectors, int8_scales = quantise_vectors(vectors, "int8", chunk_size=1)
+    assert int8_vectors.dtype == np.int8
+    assert list(int8_vectors[0]) == [64, -127, 32]
+    assert list(int8_vectors[1]) == [0, 0, 0]
+    assert np.allclose(int8_vectors * int8_scales[:, np.newaxis], vectors, atol=0.01)
+
+
+def test_GloveDistances_load_glove_mmap():
+    glove_dists = GloveDistances()
+    glove_dists.load_glove2word2vec()
+    glove_dists_mmap = GloveDistances()
+    glove_dists_mmap.load_glove_mmap()
+
+    assert glove_dists_mmap.model.index_to_key == glove_dists.model.index_to_key
+    assert np.allclose(glove_dists_mmap.model.vectors, glove_dists.model.vectors)
+
+
 def test_get_word_freq():
     word_pos_df = pd.DataFrame(
         {"Word": ["and", "and", "and", "the"], "POS": ["NOUN", "ADJ", "NOUN", "NOUN"]}
@@ -98,6 +383,39 @@ def test_get_word_comparisons():
     )
 
 
+def test_SubjectWordCounts():
+    drama_word_pos = pd.DataFrame(
+        {"Word": ["stage", "world"], "POS": ["Noun", "Verb"], "Corpus": ["Drama"] * 2}
+    )
+    subject_word_pos_corpora = {
+        "Geo": geo_word_pos,
+        "CS": cs_word_pos,
+        "Drama": drama_word_pos,
+    }
+    subject_word_counts = SubjectWordCounts(subject_word_pos_corpora)
+    assert subject_word_counts.vocab.tolist() == ["computer", "stage", "world"]
+    assert subject_word_counts.word_counts.toarray().tolist() == [
+        [1, 0, 3],
+        [3, 0, 1],
+        [0, 1, 1],
+    ]
+
+    freq_differences = subject_word_counts.freq_differences()
+    assert len(freq_differences) == 6
+    assert freq_differences[("Geo", "CS")].tolist() == [-0.5, 0, 0.5]
+    assert freq_differences[("CS", "Geo")].tolist() == [0.5, 0, -0.5]
+
+    # The same as comparing each pair separately
+    word_comparisons = subject_word_counts.word_comparisons()
+    for (sub1, sub2), word_comparisons_df in word_comparisons.items():
+        pd.testing.assert_frame_equal(
+            word_comparisons_df,
+            get_word_comparisons(
+                subject_word_pos_corpora[sub1], subject_word_pos_corpora[sub2]
+            ),
+        )
+
+
 def test_combined_pos_freq_and_count():
     (
         all_word_pos,
@@ -110,6 +428,55 @@ def test_combined_pos_freq_and_count():
     assert all_word_booklet_count == {"computer": 4, "world": 4}
 
 
+def test_combined_pos_freq_and_count_categorical():
+    # Categorical corpora with different vocabs give the same results
+    geo_categorical = geo_word_pos.astype("category")
+    cs_categorical = cs_word_pos.astype({"Word": "category"})
+    assert combined_pos_freq_and_count(
+        geo_categorical, cs_categorical
+    ) == combined_pos_freq_and_count(geo_word_pos, cs_word_pos)
+    assert get_word_freq(geo_categorical) == get_word_freq(geo_word_pos)
+
+
+def test_WordPosCounts():
+    word_pos_counts = WordPosCounts(
+        pd.DataFrame(
+            {
+                "Word": ["run", "run", "run", "fast"],
+                "POS": ["VERB", "NOUN", "VERB", "ADV"],
+            }
+        ),
+        pd.DataFrame({"Word": ["fast", "run"], "POS": ["ADJ", "NOUN"]}),
+    )
+    assert word_pos_counts.vocab.tolist() == ["fast", "run"]
+    assert word_pos_counts.pos_labels.tolist() == ["ADJ", "ADV", "NOUN", "VERB"]
+    assert word_pos_counts.counts.tolist() == [[1, 1, 0, 0], [0, 0, 2, 2]]
+    # Ties go to the first POS in sorted order, as in pd.Series.mode
+    assert word_pos_counts.to_dict(word_pos_counts.modal_pos) == {
+        "fast": "ADJ",
+        "run": "NOUN",
+    }
+    assert word_pos_counts.to_dict(word_pos_counts.word_counts) == {
+        "fast": 2,
+        "run": 4,
+    }
+    assert np.allclose(word_pos_counts.word_freq(), [2 / 6, 4 / 6])
+    assert np.allclose(
+        word_pos_counts.word_freq(divide_by_pos_freq=True), [2 / 1, 4 / 2]
+    )
+
+
+def test_shared_vocab():
+    vocab = shared_vocab(
+        pd.Series(["world", "computer"], dtype="category"), ["science", "world"]
+    )
+    assert vocab.tolist() == ["computer", "science", "world"]
+    assert vocab_codes(["world", "science", "art"], vocab).tolist() == [2, 1, -1]
+    assert vocab_codes(
+        pd.Series(["world", "computer"], dtype="category"), vocab
+    ).tolist() == [2, 0]
+
+
 def test_subject_from_df():
     assert subject_from_df(geo_word_pos) == "Geo"
 
@@ -122,16 +489,25 @@ def test_word_differences():
         all_word_booklet_freq,
         all_word_booklet_count,
     ) = combined_pos_freq_and_count(geo_word_pos, cs_word_pos)
-    assert word_differences(
+    word_differences_df = word_differences(
         sub1_word_freq,
         sub2_word_freq,
         all_word_pos,
         all_word_booklet_freq,
         all_word_booklet_count,
-    ) == {
-        "computer": (-0.5, "Noun", 0.5, 4),
-        "world": (0.5, "Noun", 0.5, 4),
-    }
+    )
+    pd.testing.assert_frame_equal(
+        word_differences_df,
+        pd.DataFrame(
+            {
+                "Freq difference": [-0.5, 0.5],
+                "POS": ["Noun", "Noun"],
+                "Word freq": [0.5, 0.5],
+                "Word count": [4, 4],
+            },
+            index=["computer", "world"],
+        ),
+    )
 
 
 def test_word_pos_corpus():
@@ -141,7 +517,6 @@ def test_word_pos_corpus():
         text_cleaner=text_cleaner,
         token_tagger=token_tagger,
         subject_label="CS",
-        lemma=False,
     )
     cs_word_pos_corpus_check = pd.DataFrame(
         {
@@ -155,8 +530,119 @@ def test_word_pos_corpus():
                 "uses",
                 "computers",
             ],
+            "Lemma": [
+                "computer",
+                "science",
+                "be",
+                "good",
+                "computer",
+                "science",
+                "use",
+                "computer",
+            ],
             "POS": ["NOUN", "NOUN", "AUX", "ADJ", "NOUN", "NOUN", "VERB", "NOUN"],
             "Corpus": ["CS"] * 8,
         }
     )
-    assert cs_word_pos_corpus.equals(cs_word_pos_corpus_check)
+    assert cs_word_pos_corpus.astype(object).equals(
+        cs_word_pos_corpus_check.astype(object)
+    )
+    # Words and lemmas are interned against one sorted vocab
+    assert cs_word_pos_corpus["Word"].cat.categories.tolist() == [
+        "be",
+        "computer",
+        "computers",
+        "good",
+        "is",
+        "science",
+        "use",
+        "uses",
+    ]
+    assert cs_word_pos_corpus["Lemma"].cat.categories.equals(
+        cs_word_pos_corpus["Word"].cat.categories
+    )
+    assert cs_word_pos_corpus["POS"].dtype == "category"
+
+    assert word_pos_corpus(
+        subject_descs=cs_descriptions * 5,
+        text_cleaner=text_cleaner,
+        token_tagger=token_tagger,
+        subject_label="CS",
+        description_index=True,
+        n_jobs=2,
+    ).equals(
+        word_pos_corpus(
+            subject_descs=cs_descriptions * 5,
+            text_cleaner=text_cleaner,
+            token_tagger=token_tagger,
+            subject_label="CS",
+            description_index=True,
+        )
+    )
+
+
+def test_word_pos_corpus_n_descriptions(tmp_path):
+    # Descriptions without words still count towards n_descriptions
+    descriptions = ["Computer science is good", "", "Computers", ""]
+    for cache_dir in (None, tmp_path, tmp_path):
+        cs_word_pos_corpus = word_pos_corpus(
+            subject_descs=descriptions,
+            text_cleaner=text_cleaner,
+            token_tagger=token_tagger,
+            subject_label="CS",
+            description_index=True,
+            cache_dir=cache_dir,
+        )
+        assert cs_word_pos_corpus.attrs["n_descriptions"] == 4
+        assert cs_word_pos_corpus["Description"].max() == 2
+
+    empty_word_pos_corpus = word_pos_corpus(
+        subject_descs=[],
+        text_cleaner=text_cleaner,
+        token_tagger=token_tagger,
+        subject_label="CS",
+        description_index=True,
+    )
+    assert len(empty_word_pos_corpus) == 0
+    assert empty_word_pos_corpus.attrs["n_descriptions"] == 0
+
+
+def test_word_pos_corpus_cache(tmp_path):
+    cs_descriptions = ["Computer science is good", "Computer science uses computers"]
+    cs_word_pos_corpus = word_pos_corpus(
+        subject_descs=cs_descriptions,
+        text_cleaner=text_cleaner,
+        token_tagger=token_tagger,
+        subject_label="CS",
+        description_index=True,
+    )
+    cached_word_pos_corpus = word_pos_corpus(
+        subject_descs=cs_descriptions,
+        text_cleaner=text_cleaner,
+        token_tagger=token_tagger,
+        subject_label="CS",
+        description_index=True,
+        cache_dir=tmp_path,
+    )
+    assert cached_word_pos_corpus.equals(cs_word_pos_corpus)
+
+    # The cached results are loaded without tagging
+    untagging_tagger = SimpleNamespace(version=token_tagger.version)
+    assert word_pos_corpus(
+        subject_descs=cs_descriptions,
+        text_cleaner=text_cleaner,
+        token_tagger=untagging_tagger,
+        subject_label="CS",
+        description_index=True,
+        cache_dir=tmp_path,
+    ).equals(cs_word_pos_corpus)
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+def test_lemmas_as_words():
+    word_pos_df = pd.DataFrame(
+        {"Word": ["uses"], "Lemma": ["use"], "POS": ["VERB"], "Corpus": ["CS"]}
+    )
+    lemma_pos_df = lemmas_as_words(word_pos_df)
+    assert lemma_pos_df["Word"].tolist() == ["use"]
+    assert word_pos_df["Word"].tolist() == ["uses"]
@@ -0,0 +1,116 @@
+import numpy as np
+from comp_sci_gender_bias.pipeline.glove_differences.resampling_utils import (
+    description_score_sums,
+    resample_weights,
+    bootstrap_mean_ci,
+    permutation_test,
+    count_extreme_permutations,
+)
+
+
+def test_description_score_sums():
+    sums, counts = description_score_sums(
+        description_ids=np.array([0, 0, 1, 1, 1, 2]),
+        group_ids=np.array([0, 1, 0, 0, -1, 1]),
+        scores=np.array([0.5, 0.25, 0.25, np.nan, 1.0, 0.75]),
+        n_descriptions=3,
+        n_groups=2,
+    )
+    assert sums.tolist() == [[0.5, 0.25], [0.25, 0], [0, 0.75]]
+    assert counts.tolist() == [[1, 1], [1, 0], [0, 1]]
+
+
+def test_resample_weights():
+    weights = resample_weights(np.random.default_rng(0), 5, 4)
+    assert weights.shape == (5, 4)
+    assert (weights.sum(axis=1) == 4).all()
+
+
+def test_bootstrap_mean_ci():
+    rng = np.random.default_rng(0)
+    sums = rng.normal(size=(50, 2)) + np.array([0, 10])
+    counts = np.ones((50, 2))
+    lower, upper = bootstrap_mean_ci(sums, counts, n_resamples=2000, seed=0)
+    means = sums.mean(axis=0)
+    assert (lower < means).all() and (means < upper).all()
+    assert (upper - lower < 1).all()
+
+    # The same seed gives the same intervals
+    lower_again, upper_again = bootstrap_mean_ci(sums, counts, n_resamples=2000, seed=0)
+    assert (lower == lower_again).all() and (upper == upper_again).all()
+
+
+def test_permutation_test():
+    rng = np.random.default_rng(0)
+    first_sums = rng.normal(size=(40, 2)) + np.array([0, 1])
+    second_sums = rng.normal(size=(30, 2))
+    first_counts = np.ones((40, 2))
+    second_counts = np.ones((30, 2))
+
+    observed, p_values = permutation_test(
+        first_sums,
+        first_counts,
+        second_sums,
+        second_counts,
+        n_permutations=2000,
+        seed=0,
+    )
+    assert np.allclose(observed, first_sums.mean(axis=0) - second_sums.mean(axis=0))
+    # No difference in the first group, a clear difference in the second
+    assert p_values[0] > 0.05
+    assert p_values[1] < 0.01
+
+    _, pool_p_values = permutation_test(
+        first_sums,
+        first_counts,
+        second_sums,
+        second_counts,
+        n_permutations=2000,
+        seed=0,
+        n_jobs=2,
+    )
+    assert pool_p_values[0] > 0.05
+    assert pool_p_values[1] < 0.01
+
+
+def test_permutation_test_empty_group():
+    rng = np.random.default_rng(0)
+    first_sums = rng.normal(size=(20, 2))
+    second_sums = rng.normal(size=(20, 2))
+    first_counts = np.ones((20, 2))
+    second_counts = np.ones((20, 2))
+    # The second group has no words in the second set of descriptions
+    second_sums[:, 1] = 0
+    second_counts[:, 1] = 0
+    # Only one description has words in the second group
+    first_counts[1:, 1] = 0
+    first_sums[1:, 1] = 0
+
+    for n_jobs in [1, 2]:
+        observed, p_values = permutation_test(
+            first_sums,
+            first_counts,
+            second_sums,
+            second_counts,
+            n_permutations=999,
+            seed=0,
+            n_jobs=n_jobs,
+        )
+        assert np.isnan(observed[1]) and np.isnan(p_values[1])
+        assert not np.isnan(p_values[0])
+
+
+def test_count_extreme_permutations_leaves_out_empty_sets():
+    # Permutations which put the fourth description (no words) in the
+    # first set have no difference and are not counted
+    n_extreme, n_valid = count_extreme_permutations(
+        sums=np.array([[1.0], [0.0], [0.0], [0.0]]),
+        counts=np.array([[1.0], [1.0], [1.0], [0.0]]),
+        n_first=1,
+        observed=np.array([1.0]),
+        n_permutations=400,
+        seed=0,
+    )
+    assert 250 < n_valid[0] < 350
+    # Only the first description in the first set is as extreme as observed
+    assert abs(n_extreme[0] / n_valid[0] - 1 / 3) < 0.1
@@ -0,0 +1,59 @@
+from comp_sci_gender_bias.pipeline.glove_differences.spelling_utils import (
+    SymSpellSuggester,
+    dictionary_stems,
+    edit_distance,
+)
+from comp_sci_gender_bias.pipeline.glove_differences.process_text_utils import (
+    TextCleaner,
+)
+
+suggester = SymSpellSuggester(
+    ["this", "thin", "these", "computer", "computers", "science"],
+    word_ranks={"this": 0, "computer": 1, "thin": 2},
+)
+
+
+def test_dictionary_stems(tmp_path):
+    dic_file = tmp_path / "en_US.dic"
+    dic_file.write_text("3\nthis/S\ncomputer/MS\nscience\n")
+    assert dictionary_stems(str(dic_file)) == ["this", "computer", "science"]
+
+
+def test_edit_distance():
+    assert edit_distance("thsi", "this", 2) == 1
+    assert edit_distance("compter", "computer", 2) == 1
+    assert edit_distance("science", "science", 2) == 0
+    assert edit_distance("abc", "xyzabc", 2) == 3
+
+
+def test_SymSpellSuggester():
+    # Closest first, then in rank order
+    assert suggester.suggest("thsi") == ["this", "thin", "these"]
+    assert suggester.suggest("compuetrs")[0] == "computers"
+    assert suggester.suggest("Scince") == ["Science"]
+    assert suggester.suggest("zzzzzz") == []
+
+
+def test_SymSpellSuggester_version():
+    words = ["this", "thin", "these", "computer", "computers", "science"]
+    same_suggester = SymSpellSuggester(
+        list(reversed(words)), word_ranks={"this": 0, "computer": 1, "thin": 2}
+    )
+    reranked_suggester = SymSpellSuggester(
+        words, word_ranks={"thin": 0, "computer": 1, "this": 2}
+    )
+    fewer_words_suggester = SymSpellSuggester(
+        words[:-1], word_ranks={"this": 0, "computer": 1, "thin": 2}
+    )
+    assert same_suggester.version == suggester.version
+    assert reranked_suggester.version != suggester.version
+    assert fewer_words_suggester.version != suggester.version
+    assert (
+        SymSpellSuggester(words, max_edit_distance=1).version
+        != SymSpellSuggester(words).version
+    )
+
+
+def test_TextCleaner_suggestion_backend():
+    text_cleaner = TextCleaner(suggestion_backend=suggester)
+    assert text_cleaner.clean("change thsi") == "change this"
@@ -0,0 +1,26 @@
+import spacy_udpipe
+import spacy_udpipe.utils
+from comp_sci_gender_bias.utils.udpipe_models import udpipe_model
+
+
+def check_downloads(tmp_path, monkeypatch, models_dir):
+    """Languages downloaded when loading the English model"""
+    monkeypatch.setattr(spacy_udpipe.utils, "MODELS_DIR", str(models_dir))
+    downloads = []
+    monkeypatch.setattr(spacy_udpipe, "download", downloads.append)
+    monkeypatch.setattr(spacy_udpipe, "load", lambda lang: f"{lang} model")
+    udpipe_model.cache_clear()
+    try:
+        assert udpipe_model("en") == "en model"
+    finally:
+        udpipe_model.cache_clear()
+    return downloads
+
+
+def test_udpipe_model_downloads_missing_model(tmp_path, monkeypatch):
+    assert check_downloads(tmp_path, monkeypatch, tmp_path / "missing") == ["en"]
+
+
+def test_udpipe_model_uses_saved_model(tmp_path, monkeypatch):
+    (tmp_path / spacy_udpipe.utils.LANGUAGES["en"]).touch()
+    assert check_downloads(tmp_path, monkeypatch, tmp_path) == []
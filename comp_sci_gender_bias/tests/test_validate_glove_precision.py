@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+from comp_sci_gender_bias.pipeline.glove_differences import validate_glove_precision
+from comp_sci_gender_bias.pipeline.glove_differences.validate_glove_precision import (
+    precision_deviations,
+)
+
+
+def test_precision_deviations(monkeypatch):
+    monkeypatch.setattr(validate_glove_precision, "GLOVE_DIMENSIONS", 100)
+    word_pos_corpora = {
+        ("BIT", "CS"): pd.DataFrame({"Word": ["mother", "father", "notawordkd"]}),
+        ("BIT", "Geo"): pd.DataFrame({"Word": ["notawordkd"]}),
+        ("BIT", "Drama"): pd.DataFrame({"Word": pd.Series([], dtype=object)}),
+    }
+    deviations = precision_deviations(word_pos_corpora, precisions=["int8"])
+    deviation_cols = [
+        "max_abs_deviation",
+        "mean_abs_deviation",
+        "mean_gender_diff_abs_deviation",
+    ]
+
+    assert deviations["subject"].tolist() == ["CS", "Geo", "Drama"]
+    assert (deviations.loc[0, deviation_cols] >= 0).all()
+    # Corpora with no words in the GloVe vocab have NaN deviations
+    assert np.isnan(deviations.loc[[1, 2], deviation_cols].to_numpy(float)).all()
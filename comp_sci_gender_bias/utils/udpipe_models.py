@@ -0,0 +1,25 @@
+import os
+from functools import lru_cache
+
+import spacy_udpipe
+import spacy_udpipe.utils
+
+
+@lru_cache(maxsize=None)
+def udpipe_model(lang: str = "en"):
+    """UDPipe spaCy pipeline for a language, loaded once per process and
+    shared by everything that uses it. The model is only downloaded if
+    it is not already saved locally.
+
+    Args:
+        lang: UDPipe model language
+
+    Returns:
+        spaCy Language object using the UDPipe model
+    """
+    model_file = os.path.join(
+        spacy_udpipe.utils.MODELS_DIR, spacy_udpipe.utils.LANGUAGES[lang]
+    )
+    if not os.path.exists(model_file):
+        spacy_udpipe.download(lang)
+    return spacy_udpipe.load(lang)